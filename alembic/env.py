@@ -11,6 +11,8 @@ from src.database import Base, DATABASE_URL
 from src.auth.models import BaseModel, User
 from src.posts.models import Post
 from src.comments.models import Comment
+from src.analytics.models import CommentDailyStats
+from src.outbox.models import OutboxMessage
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,41 @@
+"""Added ON DELETE CASCADE to post and comment foreign keys
+
+Revision ID: 0b3e5d9a7c21
+Revises: f4a8c1d7b390
+Create Date: 2026-10-18 15:48:31.209664
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0b3e5d9a7c21"
+down_revision: Union[str, None] = "f4a8c1d7b390"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+foreign_keys = [
+    ("post_user_id_fkey", "post", "user", "user_id"),
+    ("comment_user_id_fkey", "comment", "user", "user_id"),
+    ("comment_post_id_fkey", "comment", "post", "post_id"),
+    ("comment_parent_id_fkey", "comment", "comment", "parent_id"),
+]
+
+
+def replace_foreign_keys(ondelete) -> None:
+    for name, source, referent, column in foreign_keys:
+        op.drop_constraint(name, source, type_="foreignkey")
+        op.create_foreign_key(
+            name, source, referent, [column], ["id"], ondelete=ondelete
+        )
+
+
+def upgrade() -> None:
+    replace_foreign_keys("CASCADE")
+
+
+def downgrade() -> None:
+    replace_foreign_keys(None)
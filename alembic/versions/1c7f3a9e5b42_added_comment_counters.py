@@ -0,0 +1,53 @@
+"""Added denormalized comment counters to post and comment
+
+Revision ID: 1c7f3a9e5b42
+Revises: 0b3e5d9a7c21
+Create Date: 2026-10-18 16:20:44.918302
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "1c7f3a9e5b42"
+down_revision: Union[str, None] = "0b3e5d9a7c21"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "post",
+        sa.Column("comment_count", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.add_column(
+        "post",
+        sa.Column(
+            "active_comment_count", sa.Integer(), server_default="0", nullable=False
+        ),
+    )
+    op.add_column(
+        "comment",
+        sa.Column("reply_count", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.execute(
+        "UPDATE post SET "
+        "comment_count = (SELECT count(id) FROM comment WHERE post_id = post.id), "
+        "active_comment_count = (SELECT count(id) FROM comment "
+        "WHERE post_id = post.id AND is_active)"
+    )
+    op.execute(
+        "UPDATE comment SET reply_count = "
+        "(SELECT count(child.id) FROM comment AS child "
+        "WHERE child.parent_id = comment.id)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("comment", "reply_count")
+    op.drop_column("post", "active_comment_count")
+    op.drop_column("post", "comment_count")
@@ -0,0 +1,38 @@
+"""Added post foreign key to comment_daily_stats
+
+Revision ID: 2d8b4f6a1c93
+Revises: 1c7f3a9e5b42
+Create Date: 2026-10-18 20:12:05.417338
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "2d8b4f6a1c93"
+down_revision: Union[str, None] = "1c7f3a9e5b42"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "DELETE FROM comment_daily_stats WHERE post_id NOT IN (SELECT id FROM post)"
+    )
+    op.create_foreign_key(
+        "comment_daily_stats_post_id_fkey",
+        "comment_daily_stats",
+        "post",
+        ["post_id"],
+        ["id"],
+        ondelete="CASCADE",
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint(
+        "comment_daily_stats_post_id_fkey", "comment_daily_stats", type_="foreignkey"
+    )
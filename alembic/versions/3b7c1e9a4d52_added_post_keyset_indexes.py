@@ -0,0 +1,30 @@
+"""Added keyset pagination indexes for Post
+
+Revision ID: 3b7c1e9a4d52
+Revises: 8dd214f55a4d
+Create Date: 2026-10-18 10:12:04.318211
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3b7c1e9a4d52"
+down_revision: Union[str, None] = "8dd214f55a4d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_post_created_at_id", "post", ["created_at", "id"])
+    op.create_index(
+        "ix_post_user_id_created_at_id", "post", ["user_id", "created_at", "id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_post_user_id_created_at_id", table_name="post")
+    op.drop_index("ix_post_created_at_id", table_name="post")
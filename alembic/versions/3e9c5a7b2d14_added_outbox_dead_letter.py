@@ -0,0 +1,29 @@
+"""Added dead letter column to outbox
+
+Revision ID: 3e9c5a7b2d14
+Revises: 2d8b4f6a1c93
+Create Date: 2026-10-18 20:31:47.602915
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3e9c5a7b2d14"
+down_revision: Union[str, None] = "2d8b4f6a1c93"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "outbox", sa.Column("dead_lettered_at", sa.DateTime(), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("outbox", "dead_lettered_at")
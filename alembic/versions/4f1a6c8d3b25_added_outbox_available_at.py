@@ -0,0 +1,27 @@
+"""Added available at column to outbox
+
+Revision ID: 4f1a6c8d3b25
+Revises: 3e9c5a7b2d14
+Create Date: 2026-10-18 22:14:05.318470
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4f1a6c8d3b25"
+down_revision: Union[str, None] = "3e9c5a7b2d14"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("outbox", sa.Column("available_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("outbox", "available_at")
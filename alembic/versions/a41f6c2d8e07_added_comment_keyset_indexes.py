@@ -0,0 +1,36 @@
+"""Added keyset pagination indexes for Comment
+
+Revision ID: a41f6c2d8e07
+Revises: 3b7c1e9a4d52
+Create Date: 2026-10-18 11:03:47.902154
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a41f6c2d8e07"
+down_revision: Union[str, None] = "3b7c1e9a4d52"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_comment_post_id_created_at_id",
+        "comment",
+        ["post_id", "created_at", "id"],
+    )
+    op.create_index(
+        "ix_comment_user_id_created_at_id",
+        "comment",
+        ["user_id", "created_at", "id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_comment_user_id_created_at_id", table_name="comment")
+    op.drop_index("ix_comment_post_id_created_at_id", table_name="comment")
@@ -0,0 +1,44 @@
+"""Added full-text and trigram search indexes
+
+Revision ID: c5d2e8f1a6b3
+Revises: a41f6c2d8e07
+Create Date: 2026-10-18 12:26:15.441870
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c5d2e8f1a6b3"
+down_revision: Union[str, None] = "a41f6c2d8e07"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        "CREATE INDEX ix_post_search ON post USING gin "
+        "(to_tsvector('english'::regconfig, (title || ' ') || content))"
+    )
+    op.execute(
+        "CREATE INDEX ix_comment_search ON comment USING gin "
+        "(to_tsvector('english'::regconfig, content))"
+    )
+    op.execute(
+        "CREATE INDEX ix_post_title_trgm ON post USING gin (title gin_trgm_ops)"
+    )
+    op.execute(
+        'CREATE INDEX ix_user_username_trgm ON "user" USING gin '
+        "(username gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_username_trgm", table_name="user")
+    op.drop_index("ix_post_title_trgm", table_name="post")
+    op.drop_index("ix_comment_search", table_name="comment")
+    op.drop_index("ix_post_search", table_name="post")
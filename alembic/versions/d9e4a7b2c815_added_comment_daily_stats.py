@@ -0,0 +1,43 @@
+"""Added comment_daily_stats rollup
+
+Revision ID: d9e4a7b2c815
+Revises: c5d2e8f1a6b3
+Create Date: 2026-10-18 13:40:52.107364
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d9e4a7b2c815"
+down_revision: Union[str, None] = "c5d2e8f1a6b3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "comment_daily_stats",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("post_id", sa.Integer(), nullable=False),
+        sa.Column("total_comments", sa.Integer(), nullable=False),
+        sa.Column("active_comments", sa.Integer(), nullable=False),
+        sa.Column("blocked_comments", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("day", "post_id"),
+    )
+    op.execute(
+        "INSERT INTO comment_daily_stats "
+        "(day, post_id, total_comments, active_comments, blocked_comments) "
+        "SELECT date(created_at), post_id, count(id), "
+        "sum(CASE WHEN is_active THEN 1 ELSE 0 END), "
+        "sum(CASE WHEN is_active THEN 0 ELSE 1 END) "
+        "FROM comment GROUP BY date(created_at), post_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("comment_daily_stats")
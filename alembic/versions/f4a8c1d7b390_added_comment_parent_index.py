@@ -0,0 +1,30 @@
+"""Added thread traversal index for Comment
+
+Revision ID: f4a8c1d7b390
+Revises: e2b6f9c4a1d7
+Create Date: 2026-10-18 15:12:08.640517
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f4a8c1d7b390"
+down_revision: Union[str, None] = "e2b6f9c4a1d7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_comment_parent_id_created_at_id",
+        "comment",
+        ["parent_id", "created_at", "id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_comment_parent_id_created_at_id", table_name="comment")
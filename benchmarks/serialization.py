@@ -0,0 +1,112 @@
+import argparse
+import asyncio
+import time
+
+from datetime import datetime
+from types import SimpleNamespace
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from src.comments.schemas import Comment, CommentRead
+from src.posts.schemas import PostList
+from src.responses import fast_response
+from src.schemas import Page
+
+
+def make_user(id: int):
+    return SimpleNamespace(id=id, username=f"user{id}", email=f"user{id}@example.com")
+
+
+def make_post(id: int):
+    now = datetime(2024, 1, 1, 12, 0, id % 60)
+    return SimpleNamespace(
+        id=id,
+        title=f"Post {id}",
+        content="Lorem ipsum dolor sit amet " * 8,
+        auto_reply=False,
+        reply_text=None,
+        is_active=True,
+        comment_count=id % 17,
+        active_comment_count=id % 13,
+        user=make_user(id % 50),
+        created_at=now,
+        updated_at=now,
+    )
+
+
+def make_comment(id: int):
+    now = datetime(2024, 1, 1, 12, 0, id % 60)
+    return SimpleNamespace(
+        id=id,
+        content="Nice post, thanks for sharing " * 3,
+        post_id=id % 100,
+        parent_id=None,
+        user_id=id % 50,
+        is_active=True,
+        reply_count=id % 5,
+        post=SimpleNamespace(
+            id=id % 100,
+            title=f"Post {id % 100}",
+            user=make_user(id % 50),
+            created_at=now,
+            updated_at=now,
+        ),
+        user=make_user(id % 50),
+        created_at=now,
+        updated_at=now,
+    )
+
+
+endpoints = {
+    "GET /posts": (Page[PostList], make_post),
+    "GET /comments": (Page[Comment], make_comment),
+    "GET /comments/my": (Page[CommentRead], make_comment),
+}
+
+
+async def default_path(schema, data) -> bytes:
+    field = create_model_field(name="Response", type_=schema, mode="serialization")
+    content = await serialize_response(
+        field=field, response_content=data, is_coroutine=True
+    )
+    return JSONResponse(content).body
+
+
+async def validated_path(schema, data) -> bytes:
+    return fast_response(schema, data, validate=True).body
+
+
+async def fast_path(schema, data) -> bytes:
+    return fast_response(schema, data, validate=False).body
+
+
+async def measure(path, schema, data, rounds: int) -> float:
+    started_at = time.perf_counter()
+    for _ in range(rounds):
+        await path(schema, data)
+    return rounds / (time.perf_counter() - started_at)
+
+
+async def main(items: int, rounds: int):
+    print(
+        f"{'endpoint':<16}{'default rps':>14}{'validated rps':>16}"
+        f"{'fast rps':>14}{'speedup':>10}"
+    )
+    for name, (schema, factory) in endpoints.items():
+        data = {"items": [factory(id) for id in range(items)], "next_cursor": None}
+        default = await measure(default_path, schema, data, rounds)
+        validated = await measure(validated_path, schema, data, rounds)
+        fast = await measure(fast_path, schema, data, rounds)
+        print(
+            f"{name:<16}{default:>14.1f}{validated:>16.1f}"
+            f"{fast:>14.1f}{fast / default:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.items, args.rounds))
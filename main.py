@@ -1,14 +1,53 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from src.analytics.routers import analytics_router
 from src.auth.routers import user_router
 from src.celery_app import celery_app
 from src.comments.routers import comment_router
+from src.config import settings
+from src.database import session_router
+from src.jobs import job_queue
+from src.metrics.routers import metrics_router
+from src.moderation import moderator
+from src.outbox.relay import relay
 from src.posts.routers import post_router
+from src.ratelimit import RateLimitMiddleware, load_monitor, rate_limiter
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.jobs.TASK_EXECUTION_MODE == "local":
+        job_queue.start()
+    if settings.outbox.OUTBOX_RELAY_ENABLED:
+        relay.start()
+    load_monitor.start()
+    yield
+    await load_monitor.stop()
+    await relay.stop()
+    await job_queue.stop()
+    await moderator.drain()
+
+
+app = FastAPI(lifespan=lifespan)
+
+if settings.db.DB_STICKY_WINDOW:
+
+    @app.middleware("http")
+    async def track_writes(request: Request, call_next):
+        response = await call_next(request)
+        if (
+            request.method not in ("GET", "HEAD", "OPTIONS")
+            and response.status_code < 400
+        ):
+            session_router.mark_write(response)
+        return response
 
-app = FastAPI()
 
+app.add_middleware(RateLimitMiddleware, limiter=rate_limiter, monitor=load_monitor)
 
 app.include_router(user_router)
 app.include_router(post_router)
 app.include_router(comment_router)
 app.include_router(analytics_router)
+app.include_router(metrics_router)
@@ -0,0 +1,19 @@
+from datetime import date
+from sqlalchemy import ForeignKey, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+from src.database import Base
+
+
+class CommentDailyStats(Base):
+    __tablename__ = "comment_daily_stats"
+
+    day: Mapped[date] = mapped_column(primary_key=True)
+    post_id: Mapped[int] = mapped_column(
+        ForeignKey("post.id", ondelete="CASCADE"), primary_key=True
+    )
+    total_comments: Mapped[int] = mapped_column(Integer, default=0)
+    active_comments: Mapped[int] = mapped_column(Integer, default=0)
+    blocked_comments: Mapped[int] = mapped_column(Integer, default=0)
+
+    def __repr__(self):
+        return f"{self.day} post {self.post_id}: {self.total_comments}"
@@ -0,0 +1,141 @@
+from collections import Counter
+from datetime import date
+from typing import Optional
+from sqlalchemy import case, delete, func, insert, select, true
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.analytics.models import CommentDailyStats
+from src.comments.models import Comment
+
+
+class CommentStatsRepository:
+    model = CommentDailyStats
+    counters = ("total_comments", "active_comments", "blocked_comments")
+
+    def _insert(self, session: AsyncSession):
+        dialect_insert = {
+            "postgresql": postgresql.insert,
+            "sqlite": sqlite.insert,
+        }[session.bind.dialect.name]
+        return dialect_insert(self.model)
+
+    def _on_conflict_add(self, stmt):
+        return stmt.on_conflict_do_update(
+            index_elements=[self.model.day, self.model.post_id],
+            set_={
+                counter: getattr(self.model, counter) + getattr(stmt.excluded, counter)
+                for counter in self.counters
+            },
+        )
+
+    def _upsert(self, session: AsyncSession, day, post_id: int, **deltas):
+        values = {counter: deltas.get(counter, 0) for counter in self.counters}
+        stmt = self._insert(session).values(day=day, post_id=post_id, **values)
+        return self._on_conflict_add(stmt)
+
+    async def record_created(self, comment: Comment, session: AsyncSession):
+        day = (
+            select(func.date(Comment.created_at))
+            .where(Comment.id == comment.id)
+            .scalar_subquery()
+        )
+        active = 1 if comment.is_active else 0
+        await session.execute(
+            self._upsert(
+                session,
+                day,
+                comment.post_id,
+                total_comments=1,
+                active_comments=active,
+                blocked_comments=1 - active,
+            )
+        )
+
+    async def record_created_many(self, comments: list, session: AsyncSession):
+        totals, active = Counter(), Counter()
+        for comment in comments:
+            key = (comment.created_at.date(), comment.post_id)
+            totals[key] += 1
+            active[key] += 1 if comment.is_active else 0
+        for (day, post_id), total in totals.items():
+            await session.execute(
+                self._upsert(
+                    session,
+                    day,
+                    post_id,
+                    total_comments=total,
+                    active_comments=active[(day, post_id)],
+                    blocked_comments=total - active[(day, post_id)],
+                )
+            )
+
+    async def record_deleted(self, comments, session: AsyncSession):
+        """Subtract the rows of a comments selectable from the rollup.
+
+        The rows are grouped by day and post in the database, so only one row
+        per affected day reaches the upsert.
+        """
+        day = func.date(comments.c.created_at)
+        total = func.count()
+        active = func.sum(case((comments.c.is_active.is_(True), 1), else_=0))
+        deltas = (
+            select(day, comments.c.post_id, -total, -active, active - total)
+            .where(true())
+            .group_by(day, comments.c.post_id)
+        )
+        stmt = self._insert(session).from_select(
+            ["day", "post_id", *self.counters], deltas
+        )
+        await session.execute(self._on_conflict_add(stmt))
+
+    async def record_status_changes(self, deltas: dict, session: AsyncSession):
+        for (day, post_id), delta in deltas.items():
+            await session.execute(
+                self._upsert(
+                    session,
+                    day,
+                    post_id,
+                    active_comments=delta,
+                    blocked_comments=-delta,
+                )
+            )
+
+    async def get_list(
+        self,
+        session: AsyncSession,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        post_id: Optional[int] = None,
+    ):
+        stmt = select(
+            self.model.day,
+            func.sum(self.model.total_comments).label("total_comments"),
+            func.sum(self.model.active_comments).label("active_comments"),
+            func.sum(self.model.blocked_comments).label("blocked_comments"),
+        )
+        if date_from:
+            stmt = stmt.where(self.model.day >= date_from)
+        if date_to:
+            stmt = stmt.where(self.model.day <= date_to)
+        if post_id:
+            stmt = stmt.where(self.model.post_id == post_id)
+        stmt = stmt.group_by(self.model.day).order_by(self.model.day)
+
+        result = await session.execute(stmt)
+        return result.mappings().all()
+
+    async def rebuild(self, session: AsyncSession):
+        await session.execute(delete(self.model))
+        await session.execute(
+            insert(self.model).from_select(
+                ["day", "post_id", *self.counters],
+                select(
+                    func.date(Comment.created_at),
+                    Comment.post_id,
+                    func.count(Comment.id),
+                    func.sum(case((Comment.is_active.is_(True), 1), else_=0)),
+                    func.sum(case((Comment.is_active.is_(False), 1), else_=0)),
+                ).group_by(func.date(Comment.created_at), Comment.post_id),
+            )
+        )
+        await session.commit()
@@ -1,23 +1,27 @@
 from datetime import date
-from typing import Optional
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.dependencies import get_async_session, get_comment_repository
-from src.repositories import AbstractRepository
+from src.analytics.repository import CommentStatsRepository
+from src.analytics.schemas import CommentDailyBreakdown
+from src.dependencies import get_comment_stats_repository, get_read_session
 
 analytics_router = APIRouter(tags=["Analytics"], prefix="/analytics")
 
 
-@analytics_router.get("/comments-daily-breakdown")
+@analytics_router.get(
+    "/comments-daily-breakdown", response_model=List[CommentDailyBreakdown]
+)
 async def get_comments(
     date_from: Optional[date] = None,
     date_to: Optional[date] = None,
-    repository: AbstractRepository = Depends(get_comment_repository),
-    session: AsyncSession = Depends(get_async_session),
+    post_id: Optional[int] = None,
+    repository: CommentStatsRepository = Depends(get_comment_stats_repository),
+    session: AsyncSession = Depends(get_read_session),
 ):
-    comments = await repository.get_analytics(
-        session=session, date_from=date_from, date_to=date_to
+    comments = await repository.get_list(
+        session=session, date_from=date_from, date_to=date_to, post_id=post_id
     )
     return comments
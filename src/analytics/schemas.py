@@ -0,0 +1,11 @@
+from datetime import date
+from pydantic import BaseModel, ConfigDict
+
+
+class CommentDailyBreakdown(BaseModel):
+    day: date
+    total_comments: int
+    active_comments: int
+    blocked_comments: int
+
+    model_config = ConfigDict(from_attributes=True)
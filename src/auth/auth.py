@@ -5,6 +5,7 @@ from fastapi import HTTPException, status
 from jwt import InvalidTokenError
 from src.auth.hasher import hasher
 from src.auth.schemas import TokenData
+from src.auth.token_cache import token_cache
 from src.auth.token_types import TokenType
 from src.config import settings
 from src.database import SessionLocal
@@ -77,6 +78,9 @@ class Authenticator:
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+        token_data = token_cache.get(token)
+        if token_data is not None:
+            return token_data
         try:
             payload = jwt.decode(
                 token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
@@ -89,22 +93,28 @@ class Authenticator:
             token_data = TokenData(username=username, id=id, type=type)
         except InvalidTokenError:
             raise credentials_exception
+        token_cache.set(token, token_data, expires_at=payload.get("exp"))
         return token_data
 
     async def get_current_user(
         self, token, repository: AbstractRepository, session: SessionLocal
     ):
-        credentials_exception = HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-        token_data = await self.decode_token(token)
-        if token_data.type == TokenType.REFRESH_TOKEN_TYPE.value:
-            raise credentials_exception
+        token_data = await self.check_if_authenticated(token)
+        return await self.get_user(token_data, repository, session)
+
+    async def get_user(
+        self,
+        token_data: TokenData,
+        repository: AbstractRepository,
+        session: SessionLocal,
+    ):
         user = await repository.get_instance(id=token_data.id, session=session)
         if user is None:
-            raise credentials_exception
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Could not validate credentials",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
         return user
 
     async def check_if_authenticated(self, token):
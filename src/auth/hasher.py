@@ -1,14 +1,53 @@
+import asyncio
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, status
 from src.config import settings
+from src.metrics.registry import metrics
 
 
 class Hasher:
-    @staticmethod
-    async def verify_password(plain_password: str, hashed_password: str):
-        return settings.pwd_context.verify(plain_password, hashed_password)
+    def __init__(self, max_workers: int, queue_limit: int):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="hasher"
+        )
+        self._slots = threading.BoundedSemaphore(max_workers + queue_limit)
+
+    async def verify_password(self, plain_password: str, hashed_password: str):
+        return await self._run(
+            settings.pwd_context.verify, plain_password, hashed_password
+        )
+
+    async def hash(self, password: str) -> str:
+        return await self._run(settings.pwd_context.hash, password)
+
+    async def _run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            metrics.increment("hasher.rejected")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many pending password operations, try again later",
+            )
+        submitted_at = time.perf_counter()
+
+        def task():
+            started_at = time.perf_counter()
+            metrics.observe("hasher.queue_wait", started_at - submitted_at)
+            try:
+                return func(*args)
+            finally:
+                metrics.observe("hasher.hash_time", time.perf_counter() - started_at)
 
-    @staticmethod
-    async def hash(password: str) -> str:
-        return settings.pwd_context.hash(password)
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, task)
+        finally:
+            self._slots.release()
 
 
-hasher = Hasher()
+hasher = Hasher(
+    max_workers=settings.hasher.HASHER_MAX_WORKERS,
+    queue_limit=settings.hasher.HASHER_QUEUE_LIMIT,
+)
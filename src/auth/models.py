@@ -19,10 +19,13 @@ class User(BaseModel):
     is_superuser: Mapped[bool] = mapped_column(Boolean, default=False)
     is_active: Mapped[bool] = mapped_column(Boolean, default=False)
     posts: Mapped[List[Post]] = relationship(
-        Post, back_populates="user", cascade="all, delete-orphan"
+        Post, back_populates="user", cascade="all, delete-orphan", passive_deletes=True
     )
     comments: Mapped[List[Comment]] = relationship(
-        Comment, back_populates="user", cascade="all, delete-orphan"
+        Comment,
+        back_populates="user",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
 
     def __repr__(self):
@@ -1,15 +1,20 @@
 from fastapi import HTTPException
 from fastapi.responses import JSONResponse
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.auth.hasher import hasher
 from src.auth.models import User
 from src.repositories import DBRepository
+from src.response_cache import USERS_TAG, user_tag
 
 
 class UserRepository(DBRepository):
     model = User
 
+    def cache_tags(self, row) -> set:
+        return {USERS_TAG, user_tag(row.id)}
+
     async def get_list(self, session, *args, **kwargs):
         result = await session.scalars(select(self.model))
         return result.all()
@@ -17,26 +22,27 @@ class UserRepository(DBRepository):
     async def create_instance(self, data, session: AsyncSession):
         data = await self.process_data(data)
 
-        await self.check_if_user_exists(data, session)
-
         new_item = self.model(**data)
         session.add(new_item)
-        await session.commit()
+        try:
+            await session.commit()
+        except IntegrityError as exc:
+            await session.rollback()
+            raise self.integrity_error(exc)
         return JSONResponse(
             content={"message": "User created successfully", "user_id": new_item.id},
             status_code=201,
         )
 
-    async def check_if_user_exists(self, data, session):
-        instance = await self.get_by_email(data["email"], session)
-        if instance:
-            raise HTTPException(status_code=400, detail="Email already registered")
-
-        instance = await self.get_by_username(data["username"], session)
-        if instance:
-            raise HTTPException(
+    def integrity_error(self, exc: IntegrityError) -> HTTPException:
+        message = str(exc.orig)
+        if "email" in message:
+            return HTTPException(status_code=400, detail="Email already registered")
+        if "username" in message:
+            return HTTPException(
                 status_code=400, detail="User with this username already registred"
             )
+        return super().integrity_error(exc)
 
     async def get_by_email(self, email, session):
         result = await session.scalars(
@@ -1,12 +1,14 @@
 from typing import Annotated
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, Response, status
 from fastapi import Depends
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import literal
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.auth.auth import Authenticator
 from src.auth.schemas import AccessToken, User, TokenPair, UserBase
 from src.auth.repository import UserRepository
 from src.auth.schemas import UserCreate
+from src.conditional import conditional_get
 from src.config import settings
 from src.dependencies import get_user_repository, get_async_session, get_authenticator
 from src.repositories import AbstractRepository
@@ -56,13 +58,26 @@ async def refresh_token(
 
 @user_router.get("/me", response_model=User)
 async def read_users_me(
+    request: Request,
+    response: Response,
     token: Annotated[str, Depends(settings.oauth2_scheme)],
     authenticator: Authenticator = Depends(get_authenticator),
     repository: AbstractRepository = Depends(get_user_repository),
     session: AsyncSession = Depends(get_async_session),
 ):
-    return await authenticator.get_current_user(
-        token=token, repository=repository, session=session
+    token_data = await authenticator.check_if_authenticated(token=token)
+    not_modified = await conditional_get(
+        request,
+        response,
+        session,
+        repository.version_query(repository.model.id == token_data.id).add_columns(
+            literal(token_data.id)
+        ),
+    )
+    if not_modified:
+        return not_modified
+    return await authenticator.get_user(
+        token_data=token_data, repository=repository, session=session
     )
 
 
@@ -0,0 +1,53 @@
+import hashlib
+import time
+
+from collections import OrderedDict
+from typing import Optional
+from src.auth.schemas import TokenData
+from src.config import settings
+from src.metrics.registry import metrics
+
+
+class TokenCache:
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[bytes, tuple[TokenData, float]] = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[TokenData]:
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            metrics.increment("auth.token_cache.miss")
+            return None
+
+        token_data, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            metrics.increment("auth.token_cache.miss")
+            return None
+
+        self._entries.move_to_end(key)
+        metrics.increment("auth.token_cache.hit")
+        return token_data.model_copy()
+
+    def set(self, token: str, token_data: TokenData, expires_at: Optional[float]):
+        if not self.max_size or expires_at is None:
+            return
+        key = self._key(token)
+        self._entries[key] = (token_data.model_copy(), expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+token_cache = TokenCache(max_size=settings.TOKEN_CACHE_SIZE)
@@ -0,0 +1,37 @@
+import json
+
+from typing import Dict, List, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+from src.schemas import BulkItemResult, BulkResult
+
+BULK_MAX_ITEMS = 500
+
+
+def validate_items(
+    schema: Type[BaseModel], items: list
+) -> Tuple[Dict[int, BaseModel], Dict[int, List[dict]]]:
+    valid, errors = {}, {}
+    for index, item in enumerate(items):
+        try:
+            valid[index] = schema.model_validate(item)
+        except ValidationError as exc:
+            errors[index] = json.loads(exc.json(include_url=False))
+    return valid, errors
+
+
+def not_found(field: str, message: str) -> List[dict]:
+    return [{"type": "not_found", "loc": [field], "msg": message}]
+
+
+def bulk_result(created: Dict[int, int], errors: Dict[int, List[dict]]) -> BulkResult:
+    results = [BulkItemResult(index=index, id=id) for index, id in created.items()]
+    results += [
+        BulkItemResult(index=index, errors=item_errors)
+        for index, item_errors in errors.items()
+    ]
+    return BulkResult(
+        created=len(created),
+        failed=len(errors),
+        results=sorted(results, key=lambda result: result.index),
+    )
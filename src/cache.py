@@ -0,0 +1,76 @@
+import logging
+import time
+import redis.asyncio as redis
+
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryCache:
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl: Optional[float] = None):
+        if not self.max_size:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def delete(self, key):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisCache:
+    def __init__(self, url: str, prefix: str, ttl: int):
+        self.client = redis.from_url(url)
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, bytes]:
+        keys = list(keys)
+        if not keys:
+            return {}
+        try:
+            values = await self.client.mget([self._key(key) for key in keys])
+        except Exception:
+            logger.warning("Redis cache read failed", exc_info=True)
+            return {}
+        return {key: value for key, value in zip(keys, values) if value is not None}
+
+    async def set_many(self, values: Dict[str, bytes], ttl: Optional[int] = None):
+        if not values:
+            return
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for key, value in values.items():
+                    pipe.set(self._key(key), value, ex=ttl or self.ttl)
+                await pipe.execute()
+        except Exception:
+            logger.warning("Redis cache write failed", exc_info=True)
@@ -12,7 +12,7 @@ celery_app.conf.update(
     result_expires=3600,
     timezone="UTC",
     enable_utc=True,
-    task_always_eager=True,
+    task_always_eager=settings.celery.CELERY_TASK_ALWAYS_EAGER,
     task_eager_propagates=True,
     imports=["src.comments.tasks", "src.posts.tasks"],
 )
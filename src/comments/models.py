@@ -1,27 +1,38 @@
 from typing import Optional, List
-from sqlalchemy import String, ForeignKey, Boolean
+from sqlalchemy import String, ForeignKey, Boolean, Index, Integer
 from sqlalchemy.orm import Mapped, relationship
 from sqlalchemy.testing.schema import mapped_column
 from src.models import BaseModel
+from src.search import enable_sqlite_fts
 
 
 class Comment(BaseModel):
     __tablename__ = "comment"
     __allow_unmapped__ = True
+    __table_args__ = (
+        Index("ix_comment_post_id_created_at_id", "post_id", "created_at", "id"),
+        Index("ix_comment_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_comment_parent_id_created_at_id", "parent_id", "created_at", "id"),
+    )
+    __searchable__ = ("content",)
 
     id: Mapped[int] = mapped_column(primary_key=True)
     content: Mapped[str] = mapped_column(String(150))
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("user.id"))
-    post_id: Mapped[int] = mapped_column(ForeignKey("post.id"))
+    reply_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    user_id: Mapped[int] = mapped_column(ForeignKey("user.id", ondelete="CASCADE"))
+    post_id: Mapped[int] = mapped_column(ForeignKey("post.id", ondelete="CASCADE"))
     parent_id: Optional[Mapped[int]] = mapped_column(
-        ForeignKey("comment.id"), nullable=True
+        ForeignKey("comment.id", ondelete="CASCADE"), nullable=True
     )
 
     user = relationship("User", back_populates="comments")
     post = relationship("Post", back_populates="comments")
     children: List["Comment"] = relationship(
-        "Comment", back_populates="parent", cascade="all, delete-orphan"
+        "Comment",
+        back_populates="parent",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
     parent: Optional["Comment"] = relationship(
         "Comment", remote_side=[id], back_populates="children"
@@ -29,3 +40,6 @@ class Comment(BaseModel):
 
     def __repr__(self):
         return f"User {self.user_id}: {self.content}"
+
+
+enable_sqlite_fts(Comment)
@@ -1,67 +1,484 @@
-from datetime import date
-from http.client import HTTPException
-from sqlalchemy import select, func, case
+from collections import Counter
+from typing import Dict, Optional, Sequence
+from fastapi import HTTPException
+from sqlalchemy import (
+    Integer,
+    column,
+    delete,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    union_all,
+    update,
+)
+from sqlalchemy import values as values_clause
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import aliased
+from src.auth.models import User
+from src.analytics.repository import CommentStatsRepository
+from src.bulk import not_found
 from src.comments.models import Comment
+from src.outbox.models import OutboxMessage
+from src.outbox.repository import OutboxRepository
+from src.pagination import DEFAULT_PAGE_SIZE, paginate, paginate_ranked
+from src.posts.models import Post
+from src.projections import CommentReadRow, CommentRow, CommentThreadRow
 from src.repositories import DBRepository
+from src.response_cache import commit_and_invalidate, invalidate_on_commit, post_tag
+from src.search import get_search_backend
+
+
+THREAD_DEFAULT_DEPTH = 5
+THREAD_MAX_DEPTH = 20
+
+
+def delta_table(session: AsyncSession, names: Sequence[str], rows: list):
+    # Deltas are applied in one UPDATE ... FROM, sorted by id so concurrent
+    # writers lock the rows in the same order
+    rows = sorted(rows)
+    if session.bind.dialect.name == "sqlite":
+        # SQLite does not accept a column list on a VALUES alias
+        return union_all(
+            *[
+                select(
+                    *[literal(value, Integer).label(n) for value, n in zip(row, names)]
+                )
+                for row in rows
+            ]
+        ).subquery("deltas")
+    return values_clause(
+        *[column(name, Integer) for name in names], name="deltas"
+    ).data(rows)
 
 
 class CommentRepository(DBRepository):
     model = Comment
+    moderation_task = "src.comments.tasks.check_comment"
+    reply_task = "src.comments.tasks.create_reply_comment"
+    bulk_moderation_task = "src.comments.tasks.check_comments"
+    bulk_reply_task = "src.comments.tasks.create_reply_comments"
 
-    async def create_instance(self, data: dict, session: AsyncSession):
+    stats_repository = CommentStatsRepository()
+
+    def cache_tags(self, row) -> set:
+        return {post_tag(row.post_id)}
+
+    async def create_instance(
+        self, data: dict, session: AsyncSession, enqueue_reply: bool = False
+    ):
         new_item = self.model(**data)
         session.add(new_item)
-        await session.commit()
+        try:
+            await session.flush()
+        except IntegrityError:
+            await session.rollback()
+            raise HTTPException(status_code=404, detail="Invalid data")
+
+        await self.stats_repository.record_created(new_item, session)
+        await self.record_counters([new_item], session)
+        self.enqueue_moderation(new_item, session)
+        if enqueue_reply:
+            await session.execute(self.reply_message(new_item))
+        self.invalidate([new_item], session)
+        await commit_and_invalidate(session)
         return new_item
 
-    async def make_instance_inactive(self, id: int, session: AsyncSession):
-        comment = await self.get_instance(id, session)
-        if not comment:
-            raise HTTPException(status_code=404, detail="Post not found")
+    async def record_counters(self, comments: list, session: AsyncSession):
+        totals, active, replies = Counter(), Counter(), Counter()
+        for comment in comments:
+            totals[comment.post_id] += 1
+            active[comment.post_id] += 1 if comment.is_active else 0
+            if comment.parent_id:
+                replies[comment.parent_id] += 1
+        await self.adjust_post_counters(totals, active, session)
+        await self.adjust_reply_counts(replies, session)
+
+    async def adjust_post_counters(
+        self, totals: Counter, active: Counter, session: AsyncSession
+    ):
+        post_ids = set(totals) | set(active)
+        if not post_ids:
+            return
+        deltas = delta_table(
+            session,
+            ("id", "total", "active"),
+            [(post_id, totals[post_id], active[post_id]) for post_id in post_ids],
+        )
+        await session.execute(
+            update(Post)
+            .where(Post.id == deltas.c.id)
+            .values(
+                comment_count=Post.comment_count + deltas.c.total,
+                active_comment_count=Post.active_comment_count + deltas.c.active,
+                updated_at=Post.updated_at,
+            )
+        )
+
+    async def adjust_reply_counts(self, replies: Counter, session: AsyncSession):
+        if not replies:
+            return
+        deltas = delta_table(session, ("id", "delta"), list(replies.items()))
+        await session.execute(
+            update(self.model)
+            .where(self.model.id == deltas.c.id)
+            .values(
+                reply_count=self.model.reply_count + deltas.c.delta,
+                updated_at=self.model.updated_at,
+            )
+        )
+
+    def post_counts(self):
+        total = (
+            select(func.count(self.model.id))
+            .where(self.model.post_id == Post.id)
+            .scalar_subquery()
+        )
+        active = (
+            select(func.count(self.model.id))
+            .where(self.model.post_id == Post.id, self.model.is_active.is_(True))
+            .scalar_subquery()
+        )
+        return total, active
+
+    async def recount_post(self, post_id: int, session: AsyncSession):
+        total, active = self.post_counts()
+        await session.execute(
+            update(Post)
+            .where(Post.id == post_id)
+            .values(
+                comment_count=total,
+                active_comment_count=active,
+                updated_at=Post.updated_at,
+            )
+        )
+
+    async def reconcile_counters(self, session: AsyncSession) -> dict:
+        total, active = self.post_counts()
+        posts = await session.scalars(
+            update(Post)
+            .where(
+                or_(Post.comment_count != total, Post.active_comment_count != active)
+            )
+            .values(
+                comment_count=total,
+                active_comment_count=active,
+                updated_at=Post.updated_at,
+            )
+            .returning(Post.id)
+            .execution_options(synchronize_session=False)
+        )
+        post_ids = posts.all()
+        child = aliased(self.model)
+        replies = (
+            select(func.count(child.id))
+            .where(child.parent_id == self.model.id)
+            .scalar_subquery()
+        )
+        comments = (
+            await session.execute(
+                update(self.model)
+                .where(self.model.reply_count != replies)
+                .values(reply_count=replies, updated_at=self.model.updated_at)
+                .returning(self.model.post_id)
+                .execution_options(synchronize_session=False)
+            )
+        ).all()
+        invalidate_on_commit(session, *map(post_tag, post_ids))
+        self.invalidate(comments, session)
+        await commit_and_invalidate(session)
+        return {"posts": len(post_ids), "comments": len(comments)}
+
+    def subtree(self, id: int):
+        columns = (
+            self.model.id,
+            self.model.post_id,
+            self.model.is_active,
+            self.model.created_at,
+        )
+        tree = (
+            select(*columns).where(self.model.id == id).cte("subtree", recursive=True)
+        )
+        return tree.union_all(
+            select(*columns).join(tree, self.model.parent_id == tree.c.id)
+        )
+
+    async def delete_instance(self, id: int, session, user_id: int = None):
+        root = select(self.model.post_id, self.model.parent_id).where(
+            self.model.id == id
+        )
+        if user_id is not None:
+            root = root.where(self.model.user_id == user_id)
+        root = (await session.execute(root)).one_or_none()
+        if root is None:
+            raise HTTPException(status_code=404, detail="Instance not found")
+
+        await self.stats_repository.record_deleted(self.subtree(id), session)
+        await session.execute(delete(self.model).where(self.model.id == id))
+        await self.recount_post(root.post_id, session)
+        if root.parent_id:
+            await self.adjust_reply_counts(Counter({root.parent_id: -1}), session)
+        self.invalidate([root], session)
+        await commit_and_invalidate(session)
+
+    def reply_message(self, comment: Comment):
+        payload = {"post_id": comment.post_id, "parent_id": comment.id}
+        return insert(OutboxMessage).from_select(
+            ["task", "payload"],
+            select(
+                literal(self.reply_task), literal(payload, OutboxMessage.payload.type)
+            ).where(Post.id == comment.post_id, Post.auto_reply.is_(True)),
+        )
+
+    async def find_reply(self, parent_id: int, user_id: int, session: AsyncSession):
+        return await session.scalar(
+            select(self.model.id)
+            .where(self.model.parent_id == parent_id, self.model.user_id == user_id)
+            .limit(1)
+        )
+
+    async def bulk_create(self, items: Dict[int, dict], session: AsyncSession):
+        post_ids = {item["post_id"] for item in items.values()}
+        parent_ids = {item["parent_id"] for item in items.values() if item["parent_id"]}
+        posts = dict(
+            (
+                await session.execute(
+                    select(Post.id, Post.auto_reply).where(Post.id.in_(post_ids))
+                )
+            ).all()
+        )
+        parents = set()
+        if parent_ids:
+            parents = set(
+                await session.scalars(
+                    select(self.model.id).where(self.model.id.in_(parent_ids))
+                )
+            )
+
+        indexes, rows, errors = [], [], {}
+        for index, item in items.items():
+            if item["post_id"] not in posts:
+                errors[index] = not_found("post_id", "Post not found")
+            elif item["parent_id"] and item["parent_id"] not in parents:
+                errors[index] = not_found("parent_id", "Parent comment not found")
+            else:
+                indexes.append(index)
+                rows.append(item)
+        if not rows:
+            return {}, errors
+
+        try:
+            result = await session.scalars(
+                insert(self.model).returning(self.model, sort_by_parameter_order=True),
+                rows,
+            )
+            comments = result.all()
+        except IntegrityError:
+            await session.rollback()
+            raise HTTPException(status_code=409, detail="Referenced rows changed")
+
+        await self.stats_repository.record_created_many(comments, session)
+        await self.record_counters(comments, session)
+        OutboxRepository.add(
+            session,
+            self.bulk_moderation_task,
+            {
+                "items": [
+                    {"id": comment.id, "content": comment.content}
+                    for comment in comments
+                ]
+            },
+        )
+        replies = [
+            {"post_id": comment.post_id, "parent_id": comment.id}
+            for comment in comments
+            if posts[comment.post_id]
+        ]
+        if replies:
+            OutboxRepository.add(session, self.bulk_reply_task, {"items": replies})
+        self.invalidate(comments, session)
+        await commit_and_invalidate(session)
+        return dict(zip(indexes, [comment.id for comment in comments])), errors
+
+    async def make_instances_inactive(self, ids: list, session: AsyncSession):
+        stmt = (
+            update(self.model)
+            .where(self.model.id.in_(ids), self.model.is_active.is_(True))
+            .values(is_active=False)
+            .returning(self.model.created_at, self.model.post_id)
+        )
+        rows = (await session.execute(stmt)).all()
+        deltas, active = Counter(), Counter()
+        for created_at, post_id in rows:
+            deltas[(created_at.date(), post_id)] -= 1
+            active[post_id] -= 1
+        await self.stats_repository.record_status_changes(deltas, session)
+        await self.adjust_post_counters(Counter(), active, session)
+        self.invalidate(rows, session)
+        await commit_and_invalidate(session)
+
+    def list_query(self):
+        return select(
+            self.model.id,
+            self.model.content,
+            self.model.post_id,
+            self.model.parent_id,
+            self.model.user_id,
+            self.model.is_active,
+            self.model.reply_count,
+            self.model.created_at,
+            self.model.updated_at,
+        )
 
-        comment.is_active = False
-        session.add(comment)
-        await session.commit()
-        return comment
+    def get_list_version(self, post_id: int = None, user_id: int = None):
+        criteria = []
+        if user_id:
+            criteria.append(self.model.user_id == user_id)
+        if post_id:
+            criteria.append(self.model.post_id == post_id)
+        # Counter updates keep updated_at, so the counts are part of the version
+        return self.version_query(*criteria).add_columns(
+            func.sum(self.model.reply_count)
+        )
 
     async def get_list(
-        self, session: AsyncSession, post_id: int = None, user_id: int = None
+        self,
+        session: AsyncSession,
+        post_id: int = None,
+        user_id: int = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        since: Optional[str] = None,
     ):
-        result = (
-            select(self.model)
-            .options(selectinload(Comment.user))
-            .options(selectinload(Comment.post))
-        )
+        result = self.list_query()
         if user_id:
             result = result.where(self.model.user_id == user_id)
         if post_id:
             result = result.where(self.model.post_id == post_id)
 
-        result = await session.scalars(result)
-
-        return result.all()
+        return await paginate(
+            session,
+            result,
+            self.model,
+            limit,
+            cursor,
+            since,
+            row_factory=CommentRow.from_row,
+        )
 
-    async def get_analytics(
-        self, session: AsyncSession, date_from: date = None, date_to: date = None
+    async def get_user_list(
+        self,
+        session: AsyncSession,
+        user_id: int,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        since: Optional[str] = None,
     ):
-        stmt = select(
-            func.count(Comment.id).label("total_comments"),
-            func.sum(case((Comment.is_active == True, 1), else_=0)).label(
-                "active_comments"
-            ),
-            func.sum(case((Comment.is_active == False, 1), else_=0)).label(
-                "blocked_comments"
-            ),
+        author = aliased(User)
+        result = (
+            select(
+                self.model.id,
+                self.model.content,
+                self.model.is_active,
+                self.model.reply_count,
+                self.model.parent_id,
+                self.model.created_at,
+                self.model.updated_at,
+                Post.id,
+                Post.title,
+                Post.created_at,
+                Post.updated_at,
+                author.id,
+                author.username,
+                User.id,
+                User.username,
+            )
+            .select_from(self.model)
+            .join(self.model.post)
+            .join(author, Post.user_id == author.id)
+            .join(self.model.user)
+            .where(self.model.user_id == user_id)
+        )
+        return await paginate(
+            session,
+            result,
+            self.model,
+            limit,
+            cursor,
+            since,
+            row_factory=CommentReadRow.from_row,
         )
-        if date_from:
-            stmt = stmt.where(Comment.created_at >= date_from)
 
-        if date_to:
-            stmt = stmt.where(Comment.created_at <= date_to)
+    async def get_thread(
+        self,
+        session: AsyncSession,
+        post_id: int,
+        parent_id: Optional[int] = None,
+        depth: int = THREAD_DEFAULT_DEPTH,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ):
+        # Siblings are ranked before the walk so the recursion only descends
+        # into comments that survive the per-parent limit
+        ranked = (
+            select(
+                self.model.id,
+                self.model.parent_id,
+                func.row_number()
+                .over(
+                    partition_by=self.model.parent_id,
+                    order_by=(self.model.created_at, self.model.id),
+                )
+                .label("position"),
+            )
+            .where(self.model.post_id == post_id)
+            .subquery("ranked")
+        )
+        anchor = (
+            ranked.c.parent_id == parent_id
+            if parent_id
+            else ranked.c.parent_id.is_(None)
+        )
+        tree = (
+            select(ranked.c.id, literal(0).label("depth"))
+            .where(anchor, ranked.c.position <= limit)
+            .cte("thread", recursive=True)
+        )
+        tree = tree.union_all(
+            select(ranked.c.id, tree.c.depth + 1)
+            .join(tree, ranked.c.parent_id == tree.c.id)
+            .where(ranked.c.position <= limit, tree.c.depth < depth - 1)
+        )
+        stmt = (
+            self.list_query()
+            .add_columns(tree.c.depth)
+            .join(tree, tree.c.id == self.model.id)
+            .order_by(tree.c.depth, self.model.created_at, self.model.id)
+        )
 
-        result = await session.execute(stmt)
-        comments_stats = result.mappings().one_or_none()
+        roots, nodes = [], {}
+        for *values, level in (await session.execute(stmt)).all():
+            node = CommentThreadRow(*values)
+            if level == 0:
+                roots.append(node)
+            else:
+                nodes[node.parent_id].replies.append(node)
+            nodes[node.id] = node
+        return roots
 
-        return comments_stats
+    async def search(
+        self,
+        session: AsyncSession,
+        query: str,
+        post_id: int = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+    ):
+        result = self.list_query().where(self.model.is_active.is_(True))
+        if post_id:
+            result = result.where(self.model.post_id == post_id)
+        result = get_search_backend(session).apply(result, self.model, query)
+        return await paginate_ranked(
+            session, result, limit, cursor, row_factory=CommentRow.from_row
+        )
@@ -1,19 +1,31 @@
-from typing import Annotated, List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Annotated, Any, List, Optional
+from fastapi import APIRouter, Body, Depends, Query, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.responses import JSONResponse
-from src.comments.tasks import create_reply_comment, check_comment
 from src.auth.auth import Authenticator
-from src.comments.schemas import CommentBase, Comment, CommentRead, CommentUpdate
+from src.bulk import BULK_MAX_ITEMS, bulk_result, validate_items
+from src.comments.repository import THREAD_DEFAULT_DEPTH, THREAD_MAX_DEPTH
+from src.comments.schemas import (
+    CommentBase,
+    Comment,
+    CommentRead,
+    CommentThread,
+    CommentUpdate,
+)
+from src.conditional import conditional_get
 from src.config import settings
 from src.dependencies import (
     get_authenticator,
     get_comment_repository,
     get_async_session,
-    get_post_repository,
+    get_read_session,
 )
-from src.posts.repository import PostRepository
+from src.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from src.repositories import AbstractRepository
+from src.response_cache import post_tag, response_cache
+from src.responses import fast_response
+from src.schemas import BulkResult, Page
+from src.search import clean_query
 
 comment_router = APIRouter(tags=["Comments"], prefix="/comments")
 
@@ -24,53 +36,113 @@ async def create_comment(
     token: Annotated[str, Depends(settings.oauth2_scheme)],
     authenticator: Authenticator = Depends(get_authenticator),
     repository: AbstractRepository = Depends(get_comment_repository),
-    post_repository: PostRepository = Depends(get_post_repository),
     session: AsyncSession = Depends(get_async_session),
 ):
     data = data.model_dump()
-    post = await post_repository.get_instance(id=data["post_id"], session=session)
-    if not post:
-        raise HTTPException(status_code=404, detail="Invalid data")
-    if data.get("parent_id"):
-        parent = await repository.get_instance(id=data["parent_id"], session=session)
-        if not parent:
-            raise HTTPException(status_code=404, detail="Invalid data")
     token_data = await authenticator.check_if_authenticated(token=token)
     data["user_id"] = token_data.id
-    instance = await repository.create_instance(data=data, session=session)
-    check_comment.delay({"id": instance.id, "content": instance.content})
-    if post and post.auto_reply:
-        reply_comment = {
-            "content": post.reply_text,
-            "post_id": post.id,
-            "user_id": post.user_id,
-            "parent_id": instance.id,
-        }
-        create_reply_comment.delay(reply_comment)
+    instance = await repository.create_instance(
+        data=data, session=session, enqueue_reply=True
+    )
     return instance
 
 
-@comment_router.get("", response_model=List[Comment])
+@comment_router.post("/bulk", response_model=BulkResult)
+async def create_comments_bulk(
+    token: Annotated[str, Depends(settings.oauth2_scheme)],
+    items: List[Any] = Body(min_length=1, max_length=BULK_MAX_ITEMS),
+    authenticator: Authenticator = Depends(get_authenticator),
+    repository: AbstractRepository = Depends(get_comment_repository),
+    session: AsyncSession = Depends(get_async_session),
+):
+    token_data = await authenticator.check_if_authenticated(token=token)
+    valid, errors = validate_items(CommentBase, items)
+    data = {
+        index: {**item.model_dump(), "user_id": token_data.id}
+        for index, item in valid.items()
+    }
+    created = {}
+    if data:
+        created, failed = await repository.bulk_create(data, session)
+        errors.update(failed)
+    return bulk_result(created, errors)
+
+
+@comment_router.get("", response_model=Page[Comment])
 async def get_comments(
+    request: Request,
+    response: Response,
     post_id: int,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    since: Optional[str] = None,
     repository: AbstractRepository = Depends(get_comment_repository),
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_read_session),
 ):
-    comments = await repository.get_list(session=session, post_id=post_id)
-    return comments
+    async def build(tags: set):
+        not_modified = await conditional_get(
+            request, response, session, repository.get_list_version(post_id=post_id)
+        )
+        if not_modified:
+            return not_modified
+        comments = await repository.get_list(
+            session=session, post_id=post_id, limit=limit, cursor=cursor, since=since
+        )
+        return fast_response(Page[Comment], comments, response)
+
+    return await response_cache.serve(request, build, [post_tag(post_id)])
 
 
-@comment_router.get("/my", response_model=List[CommentRead])
+@comment_router.get("/thread", response_model=List[CommentThread])
+async def get_comment_thread(
+    post_id: int,
+    parent_id: Optional[int] = None,
+    depth: int = Query(THREAD_DEFAULT_DEPTH, ge=1, le=THREAD_MAX_DEPTH),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    repository: AbstractRepository = Depends(get_comment_repository),
+    session: AsyncSession = Depends(get_read_session),
+):
+    thread = await repository.get_thread(
+        session=session, post_id=post_id, parent_id=parent_id, depth=depth, limit=limit
+    )
+    return fast_response(List[CommentThread], thread)
+
+
+@comment_router.get("/search", response_model=Page[Comment])
+async def search_comments(
+    q: str = Query(min_length=1),
+    post_id: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    repository: AbstractRepository = Depends(get_comment_repository),
+    session: AsyncSession = Depends(get_read_session),
+):
+    comments = await repository.search(
+        session=session,
+        query=clean_query(q),
+        post_id=post_id,
+        limit=limit,
+        cursor=cursor,
+    )
+    return fast_response(Page[Comment], comments)
+
+
+@comment_router.get("/my", response_model=Page[CommentRead])
 async def get_my_comments(
     token: Annotated[str, Depends(settings.oauth2_scheme)],
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    since: Optional[str] = None,
     authenticator: Authenticator = Depends(get_authenticator),
     repository: AbstractRepository = Depends(get_comment_repository),
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_read_session),
 ):
     token_data = await authenticator.check_if_authenticated(token=token)
     user_id = token_data.id
-    comments = await repository.get_list(session=session, user_id=user_id)
-    return comments
+    comments = await repository.get_user_list(
+        session=session, user_id=user_id, limit=limit, cursor=cursor, since=since
+    )
+    return fast_response(Page[CommentRead], comments)
 
 
 @comment_router.put("/{comment_id}", response_model=CommentUpdate)
@@ -83,18 +155,8 @@ async def update_comment(
     session: AsyncSession = Depends(get_async_session),
 ):
     token_data = await authenticator.check_if_authenticated(token=token)
-    instance = await repository.get_instance(id=comment_id, session=session)
-    if not instance:
-        raise HTTPException(status_code=404, detail="Instance not found")
-
-    if token_data.id != instance.user_id:
-        raise HTTPException(status_code=404, detail="Incorrect credentials")
-
     updated_instance = await repository.update_instance(
-        id=comment_id, data=data, session=session
-    )
-    check_comment.delay(
-        {"id": updated_instance.id, "content": updated_instance.content}
+        id=comment_id, data=data, session=session, user_id=token_data.id
     )
     return updated_instance
 
@@ -108,14 +170,9 @@ async def delete_comment(
     session: AsyncSession = Depends(get_async_session),
 ):
     token_data = await authenticator.check_if_authenticated(token=token)
-    instance = await repository.get_instance(id=comment_id, session=session)
-    if not instance:
-        raise HTTPException(status_code=404, detail="Instance not found")
-
-    if token_data.id != instance.user_id:
-        raise HTTPException(status_code=404, detail="Incorrect credentials")
-
-    await repository.delete_instance(id=comment_id, session=session)
+    await repository.delete_instance(
+        id=comment_id, session=session, user_id=token_data.id
+    )
     return JSONResponse(
         status_code=status.HTTP_204_NO_CONTENT, content="Comment deleted"
     )
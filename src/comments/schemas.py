@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel, ConfigDict
 
@@ -23,11 +23,17 @@ class Comment(CommentBase, BaseInstance):
     id: int
     user_id: int
     is_active: bool
+    reply_count: int = 0
+
+
+class CommentThread(Comment):
+    replies: List["CommentThread"] = []
 
 
 class CommentRead(BaseInstance):
     content: str
     is_active: bool
+    reply_count: int = 0
     parent_id: Optional[int] = None
     post: PostComment
     user: UserPost
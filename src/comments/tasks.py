@@ -1,32 +1,69 @@
-import asyncio
-import json
-
 from src.celery_app import celery_app
 from src.comments.repository import CommentRepository
-from src.dependencies import get_async_session
-from src.genai import make_request_to_model
+from src.genai import ModerationItem
+from src.jobs import job_queue
+from src.moderation import moderator
+from src.posts.repository import PostRepository
+from src.worker import get_task_session, run_task
 
 
 @celery_app.task
 def create_reply_comment(data: dict):
-    asyncio.create_task(create_comment(data))
+    return run_task(create_comment(data))
+
+
+@celery_app.task
+def create_reply_comments(data: dict):
+    return run_task(create_comments(data))
 
 
 @celery_app.task
 def check_comment(data: dict):
-    asyncio.create_task(process_comment(data))
+    return run_task(process_comment(data))
+
+
+@celery_app.task
+def check_comments(data: dict):
+    return run_task(process_comments(data))
 
 
 async def create_comment(data):
-    async for session in get_async_session():
+    async for session in get_task_session():
+        post = await PostRepository().get_instance(data["post_id"], session)
+        if not post or not post.auto_reply:
+            return None
         repository = CommentRepository()
-        item = await repository.create_instance(data=data, session=session)
-        return item.__dict__
+        # The relay delivers at least once, so a redelivered message must not
+        # post the auto-reply twice
+        existing = await repository.find_reply(data["parent_id"], post.user_id, session)
+        if existing is not None:
+            return {"id": existing}
+        item = await repository.create_instance(
+            data={
+                "content": post.reply_text,
+                "post_id": post.id,
+                "user_id": post.user_id,
+                "parent_id": data["parent_id"],
+            },
+            session=session,
+        )
+        return {"id": item.id}
+
+
+async def create_comments(data):
+    return [await create_comment(item) for item in data["items"]]
 
 
 async def process_comment(data):
-    response = json.loads(make_request_to_model(data["content"]))
-    if response.get("contain_bad_words"):
-        async for session in get_async_session():
-            repository = CommentRepository()
-            await repository.make_instance_inactive(id=data["id"], session=session)
+    moderator.enqueue(ModerationItem("comment", data["id"], data["content"]))
+
+
+async def process_comments(data):
+    for item in data["items"]:
+        await process_comment(item)
+
+
+job_queue.register(create_reply_comment.name, create_comment)
+job_queue.register(create_reply_comments.name, create_comments)
+job_queue.register(check_comment.name, process_comment)
+job_queue.register(check_comments.name, process_comments)
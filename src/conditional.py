@@ -0,0 +1,56 @@
+import hashlib
+
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def make_etag(request: Request, version) -> str:
+    key = "|".join([request.url.path, request.url.query, *map(str, version)])
+    return '"' + hashlib.sha256(key.encode()).hexdigest()[:32] + '"'
+
+
+def etag_matches(etag: str, header: str) -> bool:
+    if header.strip() == "*":
+        return True
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return etag in [candidate.removeprefix("W/") for candidate in candidates]
+
+
+def not_modified_since(last_modified, header: str) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+
+def is_not_modified(request: Request, etag: str, last_modified=None) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match is not None:
+        return etag_matches(etag, if_none_match)
+    if if_modified_since is not None and last_modified is not None:
+        return not_modified_since(last_modified, if_modified_since)
+    return False
+
+
+async def conditional_get(
+    request: Request, response: Response, session: AsyncSession, version_query
+) -> Optional[Response]:
+    version = (await session.execute(version_query)).one()
+    last_modified = version[0]
+    headers = {"ETag": make_etag(request, version)}
+    if last_modified is not None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    response.headers.update(headers)
+
+    if is_not_modified(request, headers["ETag"], last_modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return None
@@ -1,5 +1,6 @@
 import os
 
+from typing import Optional
 from fastapi.security import OAuth2PasswordBearer
 from passlib.context import CryptContext
 from pydantic.v1 import BaseSettings
@@ -14,23 +15,119 @@ class DB_Settings(BaseSettings):
     DB_USER: str = os.environ.get('DB_USER')
     DB_PASSWORD: str = os.environ.get('DB_PASSWORD')
     DB_NAME: str = os.environ.get('DB_NAME')
+    DB_POOL_SIZE: int = os.environ.get('DB_POOL_SIZE', 10)
+    DB_MAX_OVERFLOW: int = os.environ.get('DB_MAX_OVERFLOW', 10)
+    DB_POOL_TIMEOUT: float = os.environ.get('DB_POOL_TIMEOUT', 30)
+    DB_POOL_RECYCLE: int = os.environ.get('DB_POOL_RECYCLE', 1800)
+    DB_POOL_PRE_PING: bool = os.environ.get('DB_POOL_PRE_PING', True)
+    DB_REPLICA_URLS: Optional[str] = os.environ.get('DB_REPLICA_URLS')
+    DB_STICKY_WINDOW: float = os.environ.get('DB_STICKY_WINDOW', 0)
 
 
 class Celery_settings(BaseSettings):
     CELERY_BROKER_URL: str = os.environ.get("CELERY_BROKER_URL")
     CELERY_RESULT_BACKEND: str = os.environ.get("CELERY_RESULT_BACKEND")
+    CELERY_TASK_ALWAYS_EAGER: bool = os.environ.get("CELERY_TASK_ALWAYS_EAGER", True)
+    CELERY_TASK_CONCURRENCY: int = os.environ.get("CELERY_TASK_CONCURRENCY", 10)
+    CELERY_DB_POOL_SIZE: int = os.environ.get("CELERY_DB_POOL_SIZE", 5)
+    CELERY_DB_MAX_OVERFLOW: int = os.environ.get("CELERY_DB_MAX_OVERFLOW", 5)
+
+
+class Hasher_settings(BaseSettings):
+    HASHER_MAX_WORKERS: int = os.environ.get("HASHER_MAX_WORKERS", 4)
+    HASHER_QUEUE_LIMIT: int = os.environ.get("HASHER_QUEUE_LIMIT", 64)
+
+
+class Moderation_settings(BaseSettings):
+    MODERATION_BATCH_SIZE: int = os.environ.get("MODERATION_BATCH_SIZE", 20)
+    MODERATION_BATCH_DELAY_MS: int = os.environ.get("MODERATION_BATCH_DELAY_MS", 50)
+    MODERATION_CACHE_SIZE: int = os.environ.get("MODERATION_CACHE_SIZE", 10000)
+    MODERATION_CACHE_TTL: int = os.environ.get("MODERATION_CACHE_TTL", 86400)
+    MODERATION_CACHE_REDIS_URL: Optional[str] = os.environ.get(
+        "MODERATION_CACHE_REDIS_URL"
+    )
+    MODERATION_MAX_CONCURRENCY: int = os.environ.get("MODERATION_MAX_CONCURRENCY", 4)
+    MODERATION_TIMEOUT: float = os.environ.get("MODERATION_TIMEOUT", 10)
+    MODERATION_MAX_RETRIES: int = os.environ.get("MODERATION_MAX_RETRIES", 2)
+    MODERATION_RETRY_BACKOFF: float = os.environ.get("MODERATION_RETRY_BACKOFF", 0.5)
+    MODERATION_BREAKER_THRESHOLD: int = os.environ.get(
+        "MODERATION_BREAKER_THRESHOLD", 5
+    )
+    MODERATION_BREAKER_RESET: float = os.environ.get("MODERATION_BREAKER_RESET", 30)
+    MODERATION_RECHECK_DELAY: float = os.environ.get("MODERATION_RECHECK_DELAY", 60)
+    MODERATION_LEXICON_PATH: str = os.environ.get(
+        "MODERATION_LEXICON_PATH",
+        os.path.join(os.path.dirname(__file__), "moderation_lexicon.txt"),
+    )
+    MODERATION_PREFILTER_BLOCK: float = os.environ.get("MODERATION_PREFILTER_BLOCK", 0.9)
+    MODERATION_PREFILTER_ALLOW: Optional[float] = os.environ.get(
+        "MODERATION_PREFILTER_ALLOW"
+    )
+
+
+class Outbox_settings(BaseSettings):
+    OUTBOX_BATCH_SIZE: int = os.environ.get("OUTBOX_BATCH_SIZE", 100)
+    OUTBOX_POLL_INTERVAL: float = os.environ.get("OUTBOX_POLL_INTERVAL", 1.0)
+    OUTBOX_RELAY_ENABLED: bool = os.environ.get("OUTBOX_RELAY_ENABLED", True)
+    OUTBOX_MAX_BACKOFF: float = os.environ.get("OUTBOX_MAX_BACKOFF", 30.0)
+
+
+class Jobs_settings(BaseSettings):
+    TASK_EXECUTION_MODE: str = os.environ.get("TASK_EXECUTION_MODE", "celery")
+    JOB_QUEUE_SIZE: int = os.environ.get("JOB_QUEUE_SIZE", 1000)
+    JOB_QUEUE_WORKERS: int = os.environ.get("JOB_QUEUE_WORKERS", 4)
+    JOB_QUEUE_PUT_TIMEOUT: float = os.environ.get("JOB_QUEUE_PUT_TIMEOUT", 5)
+    JOB_QUEUE_DRAIN_TIMEOUT: float = os.environ.get("JOB_QUEUE_DRAIN_TIMEOUT", 30)
+
+
+class Cache_settings(BaseSettings):
+    RESPONSE_CACHE_ENABLED: bool = os.environ.get("RESPONSE_CACHE_ENABLED", True)
+    RESPONSE_CACHE_TTL: int = os.environ.get("RESPONSE_CACHE_TTL", 30)
+    RESPONSE_CACHE_SIZE: int = os.environ.get("RESPONSE_CACHE_SIZE", 1000)
+    RESPONSE_CACHE_MAX_TAGS: int = os.environ.get("RESPONSE_CACHE_MAX_TAGS", 10000)
+    RESPONSE_CACHE_LOCK_TIMEOUT: float = os.environ.get(
+        "RESPONSE_CACHE_LOCK_TIMEOUT", 5
+    )
+    RESPONSE_CACHE_REDIS_URL: Optional[str] = os.environ.get(
+        "RESPONSE_CACHE_REDIS_URL"
+    )
+
+
+class Limits_settings(BaseSettings):
+    RATE_LIMIT_ENABLED: bool = os.environ.get("RATE_LIMIT_ENABLED", True)
+    RATE_LIMIT_RULES: str = os.environ.get(
+        "RATE_LIMIT_RULES",
+        "POST /users/=5/60,POST /users/token=10/60,POST /users/refresh=20/60,"
+        "POST /posts=20/60,POST /posts/bulk=5/60,"
+        "POST /comments=30/60,POST /comments/bulk=5/60",
+    )
+    RATE_LIMIT_MAX_KEYS: int = os.environ.get("RATE_LIMIT_MAX_KEYS", 100000)
+    RATE_LIMIT_REDIS_URL: Optional[str] = os.environ.get("RATE_LIMIT_REDIS_URL")
+    LOAD_MONITOR_INTERVAL: float = os.environ.get("LOAD_MONITOR_INTERVAL", 0.5)
+    LOAD_SHED_LOOP_LAG: float = os.environ.get("LOAD_SHED_LOOP_LAG", 0.5)
+    LOAD_SHED_POOL_WAIT: float = os.environ.get("LOAD_SHED_POOL_WAIT", 1.0)
 
 
 class Settings(BaseSettings):
     pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
     SECRET_KEY: str = os.environ.get("SECRET_KEY")
+    DEBUG: bool = os.environ.get("DEBUG", False)
+    METRICS_PUBLIC: bool = os.environ.get("METRICS_PUBLIC", False)
+    RESPONSE_VALIDATION: bool = os.environ.get("RESPONSE_VALIDATION", False)
     ALGORITHM = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES = 300
     REFRESH_TOKEN_EXPIRE_DAYS = 1
+    TOKEN_CACHE_SIZE: int = os.environ.get("TOKEN_CACHE_SIZE", 10000)
     oauth2_scheme = OAuth2PasswordBearer(tokenUrl="users/token")
     AI_API_KEY: str = os.environ.get("AI_API_KEY")
     celery: Celery_settings = Celery_settings()
     db: DB_Settings = DB_Settings()
+    hasher: Hasher_settings = Hasher_settings()
+    moderation: Moderation_settings = Moderation_settings()
+    outbox: Outbox_settings = Outbox_settings()
+    jobs: Jobs_settings = Jobs_settings()
+    cache: Cache_settings = Cache_settings()
+    limits: Limits_settings = Limits_settings()
 
     class Config:
         case_sensitive = True
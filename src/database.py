@@ -1,19 +1,154 @@
-from sqlalchemy import MetaData
+import itertools
+import math
+import time
+
+from sqlalchemy import MetaData, event, exc
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
 from src.config import settings
+from src.metrics.registry import metrics
 
 DATABASE_URL = (f"postgresql+asyncpg://{settings.db.DB_USER}:{settings.db.DB_PASSWORD}@"
                 f"{settings.db.DB_HOST}:{settings.db.DB_PORT}/{settings.db.DB_NAME}")
 
-async_engine = create_async_engine(DATABASE_URL, echo=True, future=True)
 
-SessionLocal = sessionmaker(
-    autocommit=False,
-    autoflush=False,
-    bind=async_engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
+def pool_metric(pool, name: str) -> str:
+    # Engines pass their role as the pool logging name, which survives
+    # pool.recreate(), so writer and replica pools report separately
+    return f"db.pool.{pool.logging_name or 'default'}.{name}"
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            metrics.increment(pool_metric(self, "timeouts"))
+            raise
+        except Exception:
+            metrics.increment(pool_metric(self, "errors"))
+            raise
+        finally:
+            metrics.observe(
+                pool_metric(self, "wait_time"), time.perf_counter() - started_at
+            )
+
+
+def pool_status(pool) -> dict:
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": settings.db.DB_MAX_OVERFLOW,
+        "timeout": pool.timeout(),
+    }
+
+
+@event.listens_for(Pool, "connect")
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    if "sqlite" in type(dbapi_connection).__module__:
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+def instrument_pool(pool):
+    def record_checkout(*args):
+        metrics.set_gauge(pool_metric(pool, "checked_out"), pool.checkedout())
+        if pool.overflow() > 0:
+            metrics.increment(pool_metric(pool, "overflow_checkouts"))
+
+    def record_checkin(*args):
+        metrics.set_gauge(
+            pool_metric(pool, "checked_out"), max(pool.checkedout() - 1, 0)
+        )
+
+    event.listen(pool, "checkout", record_checkout)
+    event.listen(pool, "checkin", record_checkin)
+
+
+def create_engine(url: str, name: str):
+    engine = create_async_engine(
+        url,
+        echo=settings.DEBUG,
+        future=True,
+        poolclass=InstrumentedPool,
+        pool_logging_name=name,
+        pool_size=settings.db.DB_POOL_SIZE,
+        max_overflow=settings.db.DB_MAX_OVERFLOW,
+        pool_timeout=settings.db.DB_POOL_TIMEOUT,
+        pool_recycle=settings.db.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.db.DB_POOL_PRE_PING,
+    )
+    instrument_pool(engine.sync_engine.pool)
+    return engine
+
+
+def create_session_maker(engine):
+    return sessionmaker(
+        autocommit=False,
+        autoflush=False,
+        bind=engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+    )
+
+
+class ReplicaRouter:
+    cookie_name = "db_sticky_until"
+
+    def __init__(self, writer, readers: list, sticky_window: float):
+        self.writer = writer
+        self.readers = readers or [writer]
+        self.sticky_window = sticky_window
+        self._readers = itertools.cycle(self.readers)
+
+    def mark_write(self, response):
+        # The marker travels with the client instead of living in one worker,
+        # so whichever worker serves the next read sees it
+        if self.sticky_window:
+            response.set_cookie(
+                self.cookie_name,
+                f"{time.time() + self.sticky_window:.3f}",
+                max_age=math.ceil(self.sticky_window),
+                httponly=True,
+                samesite="lax",
+            )
+
+    def is_sticky(self, request) -> bool:
+        if not self.sticky_window:
+            return False
+        try:
+            sticky_until = float(request.cookies.get(self.cookie_name, 0))
+        except ValueError:
+            return False
+        return time.time() < sticky_until
+
+    def reader_for(self, request):
+        if self.is_sticky(request):
+            metrics.increment("db.reads.sticky")
+            return self.writer
+        metrics.increment("db.reads.replica")
+        return next(self._readers)
+
+
+async_engine = create_engine(DATABASE_URL, "writer")
+SessionLocal = create_session_maker(async_engine)
+
+replica_urls = [
+    url.strip() for url in (settings.db.DB_REPLICA_URLS or "").split(",") if url.strip()
+]
+replica_engines = [
+    create_engine(url, f"replica{number}")
+    for number, url in enumerate(replica_urls, start=1)
+]
+session_router = ReplicaRouter(
+    writer=SessionLocal,
+    readers=[create_session_maker(engine) for engine in replica_engines],
+    sticky_window=settings.db.DB_STICKY_WINDOW,
 )
 
 
@@ -1,7 +1,9 @@
+from fastapi import Request
+from src.analytics.repository import CommentStatsRepository
 from src.auth.auth import Authenticator
 from src.auth.repository import UserRepository
 from src.comments.repository import CommentRepository
-from src.database import SessionLocal
+from src.database import SessionLocal, session_router
 from src.posts.repository import PostRepository
 from src.repositories import AbstractRepository
 
@@ -18,6 +20,10 @@ def get_comment_repository() -> AbstractRepository:
     return CommentRepository()
 
 
+def get_comment_stats_repository() -> CommentStatsRepository:
+    return CommentStatsRepository()
+
+
 def get_authenticator() -> Authenticator:
     return Authenticator()
 
@@ -25,3 +31,8 @@ def get_authenticator() -> Authenticator:
 async def get_async_session():
     async with SessionLocal() as session:
         yield session
+
+
+async def get_read_session(request: Request):
+    async with session_router.reader_for(request)() as session:
+        yield session
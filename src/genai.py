@@ -1,20 +1,367 @@
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import re
+import time
+import unicodedata
+
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional
+
 import google.generativeai as genai
 
+from src.cache import MemoryCache, RedisCache
 from src.config import settings
+from src.metrics.registry import metrics
+from src.prefilter import Prefilter
+
+logger = logging.getLogger(__name__)
+
+
+class ModerationItem(NamedTuple):
+    kind: str
+    id: int
+    content: str
+
+    @property
+    def key(self) -> str:
+        return f"{self.kind}:{self.id}"
+
+
+class ModerationUnavailable(Exception):
+    pass
+
+
+class ModerationBackend(ABC):
+    @abstractmethod
+    async def moderate(self, items: List[ModerationItem]) -> Dict[str, bool]:
+        pass
+
+
+class GeminiModerationBackend(ModerationBackend):
+    def __init__(self, api_key: str, model_name: str = "gemini-1.5-flash"):
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(
+            model_name, generation_config={"response_mime_type": "application/json"}
+        )
+
+    @staticmethod
+    def build_prompt(items: List[ModerationItem]) -> str:
+        payload = json.dumps(
+            [{"id": item.key, "content": item.content} for item in items]
+        )
+        return (
+            "Using this JSON schema: response = "
+            '{ "verdicts": [{ "id": <str>, "contain_bad_words": <bool> }] } \n'
+            "Return one verdict for every item - analysis if its content has "
+            "presence of obscene language, insults, etc\n"
+            f"items: {payload}"
+        )
+
+    @staticmethod
+    def parse_verdicts(text: str) -> Dict[str, bool]:
+        response = json.loads(text)
+        return {
+            str(verdict["id"]): bool(verdict.get("contain_bad_words"))
+            for verdict in response.get("verdicts", [])
+        }
+
+    async def moderate(self, items: List[ModerationItem]) -> Dict[str, bool]:
+        response = await self.model.generate_content_async(self.build_prompt(items))
+        return self.parse_verdicts(response.text)
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def allow_request(self) -> bool:
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self._set_state(self.HALF_OPEN)
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self._set_state(self.OPEN)
+
+    def _set_state(self, state: str):
+        if state != self.state:
+            logger.warning("Moderation circuit breaker %s -> %s", self.state, state)
+        self.state = state
+        metrics.set_gauge("moderation.breaker.state", state)
+
+
+class ModerationClient(ModerationBackend):
+    def __init__(
+        self,
+        backend: ModerationBackend,
+        max_concurrency: int,
+        timeout: float,
+        max_retries: int,
+        retry_backoff: float,
+        breaker: CircuitBreaker,
+    ):
+        self.backend = backend
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.breaker = breaker
+        self._loop = None
+        self._semaphore = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def moderate(self, items: List[ModerationItem]) -> Dict[str, bool]:
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow_request():
+                metrics.increment("moderation.short_circuited")
+                raise ModerationUnavailable("Moderation circuit breaker is open")
+            try:
+                async with self._get_semaphore():
+                    started_at = time.perf_counter()
+                    verdicts = await asyncio.wait_for(
+                        self.backend.moderate(items), timeout=self.timeout
+                    )
+                    metrics.observe(
+                        "moderation.request_time", time.perf_counter() - started_at
+                    )
+            except Exception as exc:
+                if isinstance(exc, asyncio.TimeoutError):
+                    metrics.increment("moderation.timeouts")
+                logger.warning("Moderation request failed: %r", exc)
+                if attempt == self.max_retries:
+                    self.breaker.record_failure()
+                    raise ModerationUnavailable("Moderation request failed") from exc
+                metrics.increment("moderation.retries")
+                await asyncio.sleep(random.uniform(0, self.retry_backoff * 2**attempt))
+            else:
+                self.breaker.record_success()
+                return verdicts
+
+
+def content_digest(content: str) -> str:
+    normalized = unicodedata.normalize("NFKC", content).casefold()
+    normalized = re.sub(r"\s+", " ", normalized).strip()
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+class VerdictCache:
+    def __init__(self, max_size: int, ttl: int, redis_url: Optional[str] = None):
+        self.memory = MemoryCache(max_size=max_size, ttl=ttl)
+        self.redis = (
+            RedisCache(redis_url, prefix="moderation:verdict", ttl=ttl)
+            if redis_url
+            else None
+        )
+
+    async def get_many(self, digests: Iterable[str]) -> Dict[str, bool]:
+        verdicts, missing = {}, []
+        for digest in digests:
+            verdict = self.memory.get(digest)
+            if verdict is None:
+                missing.append(digest)
+            else:
+                verdicts[digest] = verdict
+
+        if self.redis and missing:
+            for digest, value in (await self.redis.get_many(missing)).items():
+                verdicts[digest] = value == b"1"
+                self.memory.set(digest, verdicts[digest])
+        return verdicts
+
+    async def set_many(self, verdicts: Dict[str, bool]):
+        for digest, verdict in verdicts.items():
+            self.memory.set(digest, verdict)
+        if self.redis:
+            await self.redis.set_many(
+                {
+                    digest: b"1" if verdict else b"0"
+                    for digest, verdict in verdicts.items()
+                }
+            )
+
+
+class ModerationBatcher:
+    def __init__(
+        self,
+        backend: ModerationBackend,
+        handler: Callable[[List[ModerationItem]], Awaitable[None]],
+        max_batch_size: int,
+        max_delay_ms: int,
+        cache: Optional[VerdictCache] = None,
+        prefilter: Optional[Prefilter] = None,
+        defer: Optional[Callable[[List[ModerationItem]], Awaitable[None]]] = None,
+    ):
+        self.backend = backend
+        self.handler = handler
+        self.defer = defer
+        self.cache = cache
+        self.prefilter = prefilter
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay_ms / 1000
+        self._loop = None
+        self._pending = []
+        self._timer = None
+        self._tasks = set()
+
+    def _bind_loop(self) -> asyncio.AbstractEventLoop:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._pending = []
+            self._timer = None
+        return loop
+
+    async def submit(self, item: ModerationItem) -> bool:
+        future = self._bind_loop().create_future()
+        self._enqueue(item, future)
+        return await future
+
+    def enqueue(self, item: ModerationItem):
+        """Add an item to the next batch without waiting for its verdict.
+
+        Flagged items still reach the handler, so task bodies can return
+        straight away and let items from many tasks share one batch.
+        """
+        self._bind_loop()
+        self._enqueue(item)
+
+    def _enqueue(self, item: ModerationItem, future=None):
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = self._loop.call_later(self.max_delay, self._flush)
+
+    async def drain(self):
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = self._loop.create_task(self._process(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _process(self, batch):
+        items = [item for item, _ in batch]
+        metrics.increment("moderation.batches")
+        metrics.increment("moderation.items", len(items))
+        try:
+            verdicts = await self._moderate(items)
+            flagged = [item for item in items if verdicts.get(item.key)]
+            if flagged:
+                await self.handler(flagged)
+        except ModerationUnavailable:
+            await self._defer(items)
+            verdicts = {}
+        except Exception as exc:
+            logger.exception("Moderation batch of %s items failed", len(items))
+            metrics.increment("moderation.failed_batches")
+            for _, future in batch:
+                if future is not None and not future.done():
+                    future.set_exception(exc)
+            return
+
+        for item, future in batch:
+            if future is not None and not future.done():
+                future.set_result(verdicts.get(item.key, False))
+
+    async def _defer(self, items: List[ModerationItem]):
+        # Unmoderated items stay visible, so they are handed to the defer hook
+        # to be persisted and rechecked later, even across a restart
+        if self.defer is not None:
+            try:
+                await self.defer(items)
+            except Exception:
+                logger.exception("Could not defer %s unmoderated items", len(items))
+            else:
+                metrics.increment("moderation.deferred", len(items))
+                return
+        logger.error("Dropping %s unmoderated items", len(items))
+        metrics.increment("moderation.dropped", len(items))
+
+    async def _moderate(self, items: List[ModerationItem]) -> Dict[str, bool]:
+        verdicts = {}
+        if self.prefilter is not None:
+            undecided = []
+            for item in items:
+                verdict = self.prefilter.classify(item.content).verdict
+                if verdict is None:
+                    undecided.append(item)
+                    continue
+                verdicts[item.key] = verdict
+                metrics.increment(
+                    "moderation.tier.prefilter_block"
+                    if verdict
+                    else "moderation.tier.prefilter_allow"
+                )
+            items = undecided
+
+        if items:
+            verdicts.update(await self._moderate_remote(items))
+        return verdicts
+
+    async def _moderate_remote(self, items: List[ModerationItem]) -> Dict[str, bool]:
+        if self.cache is None:
+            metrics.increment("moderation.tier.model", len(items))
+            return await self.backend.moderate(items)
 
-genai.configure(api_key=settings.AI_API_KEY)
+        digests = {item.key: content_digest(item.content) for item in items}
+        known = await self.cache.get_many(set(digests.values()))
+        metrics.increment(
+            "moderation.cache.hit",
+            len([item for item in items if digests[item.key] in known]),
+        )
 
-model = genai.GenerativeModel(
-    "gemini-1.5-flash", generation_config={"response_mime_type": "application/json"}
-)
+        unknown = {}
+        for item in items:
+            if digests[item.key] not in known:
+                unknown.setdefault(digests[item.key], item)
+        if unknown:
+            metrics.increment("moderation.cache.miss", len(unknown))
+            metrics.increment("moderation.tier.model", len(unknown))
+            fresh = await self.backend.moderate(list(unknown.values()))
+            resolved = {
+                digest: bool(fresh[item.key])
+                for digest, item in unknown.items()
+                if item.key in fresh
+            }
+            await self.cache.set_many(resolved)
+            known.update(resolved)
 
+        return {item.key: known.get(digests[item.key], False) for item in items}
 
-def make_request_to_model(content: str):
-    prompt = (
-        f'Using this JSON schema: response = {{ "contain_bad_words": <bool> }} \n'
-        f"Return a response - analysis if content has presence "
-        f"of obscene language, insults, etc\n"
-        f"content: {content}"
-    )
 
-    return model.generate_content(prompt).text
+def get_default_backend() -> ModerationBackend:
+    return GeminiModerationBackend(api_key=settings.AI_API_KEY)
@@ -0,0 +1,99 @@
+import asyncio
+import logging
+import time
+
+from typing import Awaitable, Callable, Dict
+
+from src.config import settings
+from src.metrics.registry import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class JobQueue:
+    def __init__(
+        self, max_size: int, workers: int, put_timeout: float, drain_timeout: float
+    ):
+        self.max_size = max_size
+        self.workers = workers
+        self.put_timeout = put_timeout
+        self.drain_timeout = drain_timeout
+        self.handlers: Dict[str, Callable[[dict], Awaitable]] = {}
+        self._queue = None
+        self._workers = []
+        self._accepting = False
+
+    @property
+    def started(self) -> bool:
+        return bool(self._workers)
+
+    def register(self, name: str, handler: Callable[[dict], Awaitable]):
+        self.handlers[name] = handler
+
+    async def submit(self, name: str, payload: dict):
+        if not self._accepting:
+            raise JobQueueFull("Job queue is not accepting jobs")
+        if name not in self.handlers:
+            raise KeyError(f"No job handler registered for {name}")
+        try:
+            await asyncio.wait_for(
+                self._queue.put((name, payload, time.perf_counter())),
+                timeout=self.put_timeout,
+            )
+        except asyncio.TimeoutError:
+            metrics.increment("jobs.rejected")
+            raise JobQueueFull(f"Job queue is full ({self.max_size} jobs)")
+        metrics.increment("jobs.submitted")
+        metrics.set_gauge("jobs.queue_depth", self._queue.qsize())
+
+    async def _work(self):
+        while True:
+            name, payload, enqueued_at = await self._queue.get()
+            metrics.set_gauge("jobs.queue_depth", self._queue.qsize())
+            metrics.observe("jobs.queue_wait", time.perf_counter() - enqueued_at)
+            started_at = time.perf_counter()
+            try:
+                await self.handlers[name](payload)
+            except Exception:
+                logger.exception("Job %s failed", name)
+                metrics.increment("jobs.failed")
+            else:
+                metrics.increment("jobs.completed")
+            finally:
+                metrics.observe("jobs.run_time", time.perf_counter() - started_at)
+                self._queue.task_done()
+
+    def start(self):
+        if self.started:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self._accepting = True
+
+    async def stop(self):
+        if not self.started:
+            return
+        self._accepting = False
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=self.drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Job queue stopped with %s unfinished jobs", self._queue.qsize()
+            )
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        metrics.set_gauge("jobs.queue_depth", 0)
+
+
+job_queue = JobQueue(
+    max_size=settings.jobs.JOB_QUEUE_SIZE,
+    workers=settings.jobs.JOB_QUEUE_WORKERS,
+    put_timeout=settings.jobs.JOB_QUEUE_PUT_TIMEOUT,
+    drain_timeout=settings.jobs.JOB_QUEUE_DRAIN_TIMEOUT,
+)
@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.auth.auth import Authenticator
+from src.config import settings
+from src.database import async_engine, pool_metric, pool_status
+from src.dependencies import get_async_session, get_authenticator, get_user_repository
+from src.metrics.registry import metrics
+from src.repositories import AbstractRepository
+
+
+async def require_metrics_access(
+    request: Request,
+    authenticator: Authenticator = Depends(get_authenticator),
+    repository: AbstractRepository = Depends(get_user_repository),
+    session: AsyncSession = Depends(get_async_session),
+):
+    if settings.METRICS_PUBLIC:
+        return
+    token = await settings.oauth2_scheme(request)
+    user = await authenticator.get_current_user(token, repository, session)
+    if not user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions"
+        )
+
+
+metrics_router = APIRouter(
+    tags=["Metrics"],
+    prefix="/metrics",
+    dependencies=[Depends(require_metrics_access)],
+)
+
+
+@metrics_router.get("")
+async def get_metrics():
+    return metrics.snapshot()
+
+
+@metrics_router.get("/db-pool")
+async def get_db_pool_metrics():
+    pool = async_engine.sync_engine.pool
+    timings = metrics.snapshot()["timings"]
+    return {
+        **pool_status(pool),
+        "wait_time": timings.get(pool_metric(pool, "wait_time")),
+    }
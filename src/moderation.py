@@ -0,0 +1,79 @@
+from collections import defaultdict
+from typing import List
+
+from src.comments.repository import CommentRepository
+from src.config import settings
+from src.genai import (
+    CircuitBreaker,
+    ModerationBatcher,
+    ModerationClient,
+    ModerationItem,
+    VerdictCache,
+    get_default_backend,
+)
+from src.outbox.repository import OutboxRepository
+from src.posts.repository import PostRepository
+from src.prefilter import Prefilter, load_lexicon
+from src.worker import get_task_session, runtime
+
+repositories = {
+    "comment": CommentRepository(),
+    "post": PostRepository(),
+}
+
+
+async def deactivate_flagged(
+    items: List[ModerationItem], session_factory=get_task_session
+):
+    flagged = defaultdict(list)
+    for item in items:
+        flagged[item.kind].append(item.id)
+
+    async for session in session_factory():
+        for kind, ids in flagged.items():
+            await repositories[kind].make_instances_inactive(ids, session)
+
+
+async def defer_unmoderated(
+    items: List[ModerationItem], session_factory=get_task_session
+):
+    async for session in session_factory():
+        for item in items:
+            OutboxRepository.add(
+                session,
+                repositories[item.kind].moderation_task,
+                {"id": item.id, "content": item.content},
+                delay=settings.moderation.MODERATION_RECHECK_DELAY,
+            )
+        await session.commit()
+
+
+moderator = ModerationBatcher(
+    backend=ModerationClient(
+        get_default_backend(),
+        max_concurrency=settings.moderation.MODERATION_MAX_CONCURRENCY,
+        timeout=settings.moderation.MODERATION_TIMEOUT,
+        max_retries=settings.moderation.MODERATION_MAX_RETRIES,
+        retry_backoff=settings.moderation.MODERATION_RETRY_BACKOFF,
+        breaker=CircuitBreaker(
+            failure_threshold=settings.moderation.MODERATION_BREAKER_THRESHOLD,
+            reset_timeout=settings.moderation.MODERATION_BREAKER_RESET,
+        ),
+    ),
+    handler=deactivate_flagged,
+    defer=defer_unmoderated,
+    max_batch_size=settings.moderation.MODERATION_BATCH_SIZE,
+    max_delay_ms=settings.moderation.MODERATION_BATCH_DELAY_MS,
+    cache=VerdictCache(
+        max_size=settings.moderation.MODERATION_CACHE_SIZE,
+        ttl=settings.moderation.MODERATION_CACHE_TTL,
+        redis_url=settings.moderation.MODERATION_CACHE_REDIS_URL,
+    ),
+    prefilter=Prefilter(
+        load_lexicon(settings.moderation.MODERATION_LEXICON_PATH),
+        block_threshold=settings.moderation.MODERATION_PREFILTER_BLOCK,
+        allow_threshold=settings.moderation.MODERATION_PREFILTER_ALLOW,
+    ),
+)
+
+runtime.on_shutdown.append(moderator.drain)
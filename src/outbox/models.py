@@ -0,0 +1,18 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import JSON, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+from src.models import BaseModel
+
+
+class OutboxMessage(BaseModel):
+    __tablename__ = "outbox"
+
+    task: Mapped[str] = mapped_column(String(150))
+    payload: Mapped[dict] = mapped_column(JSON)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    dead_lettered_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
+    available_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
+
+    def __repr__(self):
+        return f"{self.task}: {self.payload}"
@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import time
+
+from typing import Awaitable, Callable, List
+
+from kombu.exceptions import EncodeError
+from src.celery_app import celery_app
+from src.config import settings
+from src.jobs import job_queue
+from src.metrics.registry import metrics
+from src.outbox.models import OutboxMessage
+from src.outbox.repository import OutboxRepository, commit_listeners
+from src.worker import get_task_session
+
+logger = logging.getLogger(__name__)
+
+PERMANENT_ERRORS = (KeyError, TypeError, ValueError, EncodeError)
+
+
+async def publish_to_celery(message: OutboxMessage):
+    task = celery_app.tasks[message.task]
+    if celery_app.conf.task_always_eager:
+        task.apply_async(args=[message.payload])
+    else:
+        await asyncio.to_thread(task.apply_async, args=[message.payload])
+
+
+async def publish_to_job_queue(message: OutboxMessage):
+    await job_queue.submit(message.task, message.payload)
+
+
+publishers = {
+    "celery": publish_to_celery,
+    "local": publish_to_job_queue,
+}
+
+
+class OutboxRelay:
+    def __init__(
+        self,
+        publisher: Callable[[OutboxMessage], Awaitable[None]],
+        batch_size: int,
+        poll_interval: float,
+        max_backoff: float = 30.0,
+        session_factory=get_task_session,
+    ):
+        self.publisher = publisher
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_backoff = max_backoff
+        self.session_factory = session_factory
+        self.repository = OutboxRepository()
+        self._loop = None
+        self._wakeup = None
+        self._task = None
+
+    def notify(self):
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def drain_once(self) -> int:
+        started_at = time.perf_counter()
+        messages = []
+        async for session in self.session_factory():
+            messages = await self.repository.get_batch(session, self.batch_size)
+            if messages:
+                await self._publish(messages, session)
+
+        if messages:
+            metrics.increment("outbox.batches")
+            metrics.observe("outbox.batch_time", time.perf_counter() - started_at)
+        return len(messages)
+
+    async def _publish(self, messages: List[OutboxMessage], session):
+        published, error = [], None
+        for message in messages:
+            try:
+                await self.publisher(message)
+            except PERMANENT_ERRORS as exc:
+                # Retrying cannot fix an unknown task or an unencodable payload,
+                # so it is parked for requeue instead of blocking the outbox
+                await self.repository.dead_letter(message.id, session)
+                logger.error("Outbox message %s dead-lettered: %r", message.id, exc)
+                metrics.increment("outbox.dead_lettered")
+                continue
+            except Exception as exc:
+                error = exc
+                break
+            published.append(message.id)
+
+        if published:
+            await self.repository.delete_many(published, session)
+            metrics.increment("outbox.published", len(published))
+        await session.commit()
+
+        if error is not None:
+            logger.warning("Outbox relay failed to publish message: %r", error)
+            metrics.increment("outbox.failed_batches")
+            raise error
+
+    async def run(self):
+        backoff = self.poll_interval
+        while True:
+            try:
+                published = await self.drain_once()
+            except Exception:
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+            backoff = self.poll_interval
+            if published < self.batch_size:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(), timeout=self.poll_interval
+                    )
+                except asyncio.TimeoutError:
+                    pass
+
+    def start(self):
+        # Task modules register both the Celery tasks and the local job
+        # handlers, so they are imported once before anything is published
+        celery_app.loader.import_default_modules()
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = self._loop.create_task(self.run())
+        commit_listeners.append(self.notify)
+
+    async def stop(self):
+        if self._task is None:
+            return
+        commit_listeners.remove(self.notify)
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._loop = None
+        try:
+            await self.drain_once()
+        except Exception:
+            logger.warning("Outbox relay stopped with undelivered messages")
+
+
+relay = OutboxRelay(
+    publisher=publishers[settings.jobs.TASK_EXECUTION_MODE],
+    batch_size=settings.outbox.OUTBOX_BATCH_SIZE,
+    poll_interval=settings.outbox.OUTBOX_POLL_INTERVAL,
+    max_backoff=settings.outbox.OUTBOX_MAX_BACKOFF,
+)
@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import delete, event, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from src.outbox.models import OutboxMessage
+
+commit_listeners = []
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class OutboxRepository:
+    model = OutboxMessage
+
+    @staticmethod
+    def add(session: AsyncSession, task: str, payload: dict, delay: float = 0):
+        available_at = utcnow() + timedelta(seconds=delay) if delay else None
+        session.add(
+            OutboxMessage(task=task, payload=payload, available_at=available_at)
+        )
+        session.info["outbox_pending"] = True
+
+    async def get_batch(self, session: AsyncSession, limit: int):
+        result = await session.scalars(
+            select(self.model)
+            .where(
+                self.model.dead_lettered_at.is_(None),
+                or_(
+                    self.model.available_at.is_(None),
+                    self.model.available_at <= utcnow(),
+                ),
+            )
+            .order_by(self.model.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        return result.all()
+
+    async def delete_many(self, ids: list, session: AsyncSession):
+        await session.execute(delete(self.model).where(self.model.id.in_(ids)))
+
+    async def dead_letter(self, id: int, session: AsyncSession):
+        await session.execute(
+            update(self.model)
+            .where(self.model.id == id)
+            .values(attempts=self.model.attempts + 1, dead_lettered_at=func.now())
+        )
+
+    async def requeue_dead_letters(
+        self, session: AsyncSession, ids: Optional[list] = None
+    ) -> int:
+        stmt = update(self.model).where(self.model.dead_lettered_at.is_not(None))
+        if ids:
+            stmt = stmt.where(self.model.id.in_(ids))
+        result = await session.scalars(
+            stmt.values(dead_lettered_at=None).returning(self.model.id)
+        )
+        requeued = len(result.all())
+        if requeued:
+            session.info["outbox_pending"] = True
+        await session.commit()
+        return requeued
+
+
+@event.listens_for(Session, "after_commit")
+def notify_commit_listeners(session):
+    if session.info.pop("outbox_pending", False):
+        for listener in commit_listeners:
+            listener()
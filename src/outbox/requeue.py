@@ -0,0 +1,20 @@
+import asyncio
+import logging
+import sys
+
+from src.dependencies import get_async_session
+from src.outbox.repository import OutboxRepository
+
+logger = logging.getLogger(__name__)
+
+
+async def requeue(ids: list = None):
+    async for session in get_async_session():
+        requeued = await OutboxRepository().requeue_dead_letters(session, ids)
+        logger.info("Requeued %s dead-lettered outbox messages", requeued)
+        return requeued
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(requeue([int(id) for id in sys.argv[1:]]))
@@ -0,0 +1,120 @@
+import base64
+import binascii
+import json
+
+from datetime import datetime
+from typing import Callable, Optional
+from fastapi import HTTPException, status
+from sqlalchemy import func, select, tuple_
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class Cursor:
+    __slots__ = ("created_at", "id")
+
+    def __init__(self, created_at: datetime, id: int):
+        self.created_at = created_at
+        self.id = id
+
+    def encode(self) -> str:
+        raw = json.dumps([self.created_at.isoformat(), self.id]).encode()
+        return base64.urlsafe_b64encode(raw).decode()
+
+    @classmethod
+    def decode(cls, value: str) -> "Cursor":
+        try:
+            created_at, id = json.loads(base64.urlsafe_b64decode(value.encode()))
+            return cls(datetime.fromisoformat(created_at), int(id))
+        except (binascii.Error, ValueError, TypeError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+            )
+
+
+def decode_offset(value: Optional[str]) -> int:
+    if not value:
+        return 0
+    try:
+        offset = json.loads(base64.urlsafe_b64decode(value.encode()))["offset"]
+        return max(int(offset), 0)
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+def encode_offset(offset: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"offset": offset}).encode()).decode()
+
+
+def keyset_order(stmt, model):
+    return stmt.order_by(model.created_at.desc(), model.id.desc())
+
+
+def keyset_position(model, value: str):
+    cursor = Cursor.decode(value)
+    # Compare against the stored anchor timestamp so precision never drifts
+    anchor = select(model.created_at).where(model.id == cursor.id).scalar_subquery()
+    created_at = func.coalesce(anchor, cursor.created_at)
+    return tuple_(model.created_at, model.id), tuple_(created_at, cursor.id)
+
+
+def keyset_filter(
+    stmt, model, cursor: Optional[str] = None, since: Optional[str] = None
+):
+    if cursor:
+        key, position = keyset_position(model, cursor)
+        stmt = stmt.where(key < position)
+    if since:
+        key, position = keyset_position(model, since)
+        stmt = stmt.where(key > position)
+    return stmt
+
+
+async def fetch(session, stmt, row_factory: Optional[Callable] = None):
+    if row_factory is None:
+        return (await session.scalars(stmt)).all()
+    return [row_factory(row) for row in await session.execute(stmt)]
+
+
+async def paginate(
+    session,
+    stmt,
+    model,
+    limit: int,
+    cursor: Optional[str] = None,
+    since: Optional[str] = None,
+    row_factory: Optional[Callable] = None,
+):
+    stmt = keyset_filter(stmt, model, cursor, since)
+    stmt = keyset_order(stmt, model).limit(limit + 1)
+    items = await fetch(session, stmt, row_factory)
+
+    next_cursor = prev_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = Cursor(items[-1].created_at, items[-1].id).encode()
+    if items:
+        prev_cursor = Cursor(items[0].created_at, items[0].id).encode()
+
+    return {"items": items, "next_cursor": next_cursor, "prev_cursor": prev_cursor}
+
+
+async def paginate_ranked(
+    session,
+    stmt,
+    limit: int,
+    cursor: Optional[str] = None,
+    row_factory: Optional[Callable] = None,
+):
+    offset = decode_offset(cursor)
+    items = await fetch(session, stmt.offset(offset).limit(limit + 1), row_factory)
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_offset(offset + limit)
+
+    return {"items": items, "next_cursor": next_cursor}
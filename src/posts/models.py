@@ -1,25 +1,41 @@
 from typing import Optional, List
-from sqlalchemy import String, Boolean, ForeignKey
+from sqlalchemy import String, Boolean, ForeignKey, Index, Integer
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.comments.models import Comment
 from src.models import BaseModel
+from src.search import enable_sqlite_fts
 
 
 class Post(BaseModel):
     __tablename__ = "post"
+    __table_args__ = (
+        Index("ix_post_created_at_id", "created_at", "id"),
+        Index("ix_post_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
+    __searchable__ = ("title", "content")
 
     title: Mapped[str] = mapped_column(String(30))
     content: Mapped[str]
     auto_reply: Mapped[bool] = mapped_column(Boolean, default=False)
     reply_text: Mapped[Optional[str]] = mapped_column(String(150), nullable=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("user.id"))
+    comment_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    active_comment_count: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0"
+    )
+    user_id: Mapped[int] = mapped_column(ForeignKey("user.id", ondelete="CASCADE"))
     comments: Mapped[List[Comment]] = relationship(
-        Comment, back_populates="post", cascade="all, delete-orphan"
+        Comment,
+        back_populates="post",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
 
     user = relationship("User", back_populates="posts")
 
     def __repr__(self):
         return f"Owner id: {self.user_id} - {self.title}"
+
+
+enable_sqlite_fts(Post)
@@ -1,48 +1,127 @@
-from typing import Optional
+from typing import Dict, Optional
 
-from fastapi import HTTPException
-from sqlalchemy import select
+from sqlalchemy import func, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 from src.auth.models import User
+from src.outbox.repository import OutboxRepository
+from src.pagination import DEFAULT_PAGE_SIZE, paginate, paginate_ranked
 from src.posts.models import Post
+from src.projections import PostListRow
 from src.repositories import DBRepository
+from src.response_cache import (
+    POSTS_TAG,
+    commit_and_invalidate,
+    invalidate_on_commit,
+    post_tag,
+)
+from src.search import get_search_backend
 
 
 class PostRepository(DBRepository):
     model = Post
+    moderation_task = "src.posts.tasks.check_post"
+    bulk_moderation_task = "src.posts.tasks.check_posts"
+
+    def cache_tags(self, row) -> set:
+        return {POSTS_TAG, post_tag(row.id)}
 
     async def create_instance(self, data, session):
         new_item = self.model(**data)
         session.add(new_item)
-        await session.commit()
+        await session.flush()
+        self.enqueue_moderation(new_item, session)
+        invalidate_on_commit(session, POSTS_TAG)
+        await commit_and_invalidate(session)
         return new_item
 
-    async def get_list(
+    async def bulk_create(self, items: Dict[int, dict], session: AsyncSession):
+        result = await session.scalars(
+            insert(self.model).returning(self.model, sort_by_parameter_order=True),
+            list(items.values()),
+        )
+        posts = result.all()
+        OutboxRepository.add(
+            session,
+            self.bulk_moderation_task,
+            {"items": [{"id": post.id, "content": post.content} for post in posts]},
+        )
+        invalidate_on_commit(session, POSTS_TAG)
+        await commit_and_invalidate(session)
+        return dict(zip(items, [post.id for post in posts])), {}
+
+    def filter_list(
         self,
-        session,
+        stmt,
         user_id: Optional[int] = None,
         username: Optional[str] = None,
         title: Optional[str] = None,
     ):
-        result = select(self.model).options(selectinload(self.model.user))
         if user_id:
-            result = result.where(self.model.user_id == user_id)
+            stmt = stmt.where(self.model.user_id == user_id)
         if username:
-            result = result.join(self.model.user).where(
-                User.username.ilike(f"%{username}%")
-            )
+            stmt = stmt.where(User.username.ilike(f"%{username}%"))
         if title:
-            result = result.where(self.model.title.ilike(f"%{title}%"))
-        result = await session.scalars(result)
-        return result.all()
-
-    async def make_instance_inactive(self, id: int, session: AsyncSession):
-        post = await self.get_instance(id, session)
-        if not post:
-            raise HTTPException(status_code=404, detail="Post not found")
-
-        post.is_active = False
-        session.add(post)
-        await session.commit()
-        return post
+            stmt = stmt.where(self.model.title.ilike(f"%{title}%"))
+        return stmt
+
+    def list_query(self):
+        return (
+            select(
+                self.model.id,
+                self.model.title,
+                self.model.content,
+                self.model.auto_reply,
+                self.model.reply_text,
+                self.model.is_active,
+                self.model.comment_count,
+                self.model.active_comment_count,
+                self.model.created_at,
+                self.model.updated_at,
+                User.id,
+                User.username,
+            )
+            .select_from(self.model)
+            .join(self.model.user)
+        )
+
+    def get_list_version(
+        self,
+        user_id: Optional[int] = None,
+        username: Optional[str] = None,
+        title: Optional[str] = None,
+    ):
+        # Counter updates keep updated_at, so the counts are part of the version
+        stmt = self.version_query().add_columns(
+            func.max(User.updated_at),
+            func.sum(self.model.comment_count),
+            func.sum(self.model.active_comment_count),
+        )
+        stmt = stmt.join(self.model.user)
+        return self.filter_list(stmt, user_id, username, title)
+
+    async def get_list(
+        self,
+        session,
+        user_id: Optional[int] = None,
+        username: Optional[str] = None,
+        title: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+    ):
+        result = self.filter_list(self.list_query(), user_id, username, title)
+        return await paginate(
+            session, result, self.model, limit, cursor, row_factory=PostListRow.from_row
+        )
+
+    async def search(
+        self,
+        session,
+        query: str,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+    ):
+        result = self.list_query().where(self.model.is_active.is_(True))
+        result = get_search_backend(session).apply(result, self.model, query)
+        return await paginate_ranked(
+            session, result, limit, cursor, row_factory=PostListRow.from_row
+        )
@@ -1,13 +1,24 @@
-from typing import Annotated, List, Optional
-from fastapi import APIRouter, Depends, status, HTTPException
+from typing import Annotated, Any, List, Optional
+from fastapi import APIRouter, Body, Depends, Query, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.responses import JSONResponse
 from src.auth.auth import Authenticator
+from src.bulk import BULK_MAX_ITEMS, bulk_result, validate_items
+from src.conditional import conditional_get
 from src.config import settings
-from src.dependencies import get_authenticator, get_post_repository, get_async_session
+from src.dependencies import (
+    get_async_session,
+    get_authenticator,
+    get_post_repository,
+    get_read_session,
+)
+from src.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from src.posts.repository import PostRepository
 from src.posts.schemas import Post, PostBase, PostList
-from src.posts.tasks import check_post
+from src.response_cache import POSTS_TAG, USERS_TAG, post_tag, response_cache, user_tag
+from src.responses import fast_response
+from src.schemas import BulkResult, Page
+from src.search import clean_query
 
 post_router = APIRouter(tags=["Posts"], prefix="/posts")
 
@@ -25,33 +36,91 @@ async def create_post(
     data = data.model_dump()
     data["user_id"] = token_data.id
     instance = await repository.create_instance(data=data, session=session)
-    check_post.delay({"id": instance.id, "content": instance.content})
     return instance
 
 
-@post_router.get("", response_model=List[PostList])
+@post_router.post("/bulk", response_model=BulkResult)
+async def create_posts_bulk(
+    token: Annotated[str, Depends(settings.oauth2_scheme)],
+    items: List[Any] = Body(min_length=1, max_length=BULK_MAX_ITEMS),
+    authenticator: Authenticator = Depends(get_authenticator),
+    session: AsyncSession = Depends(get_async_session),
+    repository: PostRepository = Depends(get_post_repository),
+):
+    token_data = await authenticator.check_if_authenticated(token=token)
+    valid, errors = validate_items(PostBase, items)
+    data = {
+        index: {**item.model_dump(), "user_id": token_data.id}
+        for index, item in valid.items()
+    }
+    created = {}
+    if data:
+        created, failed = await repository.bulk_create(data, session)
+        errors.update(failed)
+    return bulk_result(created, errors)
+
+
+@post_router.get("", response_model=Page[PostList])
 async def get_posts(
+    request: Request,
+    response: Response,
     username: Optional[str] = None,
     title: Optional[str] = None,
-    session: AsyncSession = Depends(get_async_session),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_read_session),
     repository: PostRepository = Depends(get_post_repository),
 ):
-    posts = await repository.get_list(username=username, title=title, session=session)
-    return posts
+    async def build(tags: set):
+        not_modified = await conditional_get(
+            request,
+            response,
+            session,
+            repository.get_list_version(username=username, title=title),
+        )
+        if not_modified:
+            return not_modified
+        posts = await repository.get_list(
+            username=username, title=title, limit=limit, cursor=cursor, session=session
+        )
+        for post in posts["items"]:
+            tags.update((post_tag(post.id), user_tag(post.user.id)))
+        return fast_response(Page[PostList], posts, response)
 
+    tags = [POSTS_TAG, USERS_TAG] if username else [POSTS_TAG]
+    return await response_cache.serve(request, build, tags)
 
-@post_router.get("/my", response_model=List[PostList])
+
+@post_router.get("/search", response_model=Page[PostList])
+async def search_posts(
+    q: str = Query(min_length=1),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_read_session),
+    repository: PostRepository = Depends(get_post_repository),
+):
+    posts = await repository.search(
+        query=clean_query(q), limit=limit, cursor=cursor, session=session
+    )
+    return fast_response(Page[PostList], posts)
+
+
+@post_router.get("/my", response_model=Page[PostList])
 async def get_personal_posts(
     token: Annotated[str, Depends(settings.oauth2_scheme)],
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     authenticator: Authenticator = Depends(get_authenticator),
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_read_session),
     repository: PostRepository = Depends(get_post_repository),
 ):
 
     token_data = await authenticator.check_if_authenticated(token=token)
     user_id = token_data.id
-    posts = await repository.get_list(user_id=user_id, session=session)
-    return posts
+    posts = await repository.get_list(
+        user_id=user_id, limit=limit, cursor=cursor, session=session
+    )
+    return fast_response(Page[PostList], posts)
 
 
 @post_router.put("/{post_id}", response_model=PostBase)
@@ -64,21 +133,9 @@ async def update_post(
     repository: PostRepository = Depends(get_post_repository),
 ):
     token_data = await authenticator.check_if_authenticated(token=token)
-    instance = await repository.get_instance(id=post_id, session=session)
-    if not instance:
-        raise HTTPException(
-            status_code=status.HTTP_404_BAD_REQUEST, detail="Instance not found"
-        )
-
-    if token_data.id != instance.user_id:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail="Incorrect credentials"
-        )
-
     updated_instance = await repository.update_instance(
-        id=post_id, data=data, session=session
+        id=post_id, data=data, session=session, user_id=token_data.id
     )
-    check_post.delay({"id": updated_instance.id, "content": updated_instance.content})
     return updated_instance
 
 
@@ -91,12 +148,5 @@ async def delete_post(
     repository: PostRepository = Depends(get_post_repository),
 ):
     token_data = await authenticator.check_if_authenticated(token=token)
-    instance = await repository.get_instance(id=post_id, session=session)
-    if not instance:
-        raise HTTPException(status_code=404, detail="Instance not found")
-
-    if token_data.id != instance.user_id:
-        raise HTTPException(status_code=404, detail="Incorrect credentials")
-
-    await repository.delete_instance(id=post_id, session=session)
+    await repository.delete_instance(id=post_id, session=session, user_id=token_data.id)
     return JSONResponse(status_code=status.HTTP_204_NO_CONTENT, content="Post deleted")
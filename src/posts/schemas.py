@@ -19,6 +19,8 @@ class Post(PostBase, BaseInstance):
 class PostList(PostBase, BaseInstance):
     id: int
     is_active: bool
+    comment_count: int = 0
+    active_comment_count: int = 0
     user: UserPost
 
     model_config = ConfigDict(from_attributes=True)
@@ -1,20 +1,28 @@
-import asyncio
-import json
-
 from src.celery_app import celery_app
-from src.dependencies import get_async_session
-from src.genai import make_request_to_model
-from src.posts.repository import PostRepository
+from src.genai import ModerationItem
+from src.jobs import job_queue
+from src.moderation import moderator
+from src.worker import run_task
 
 
 @celery_app.task
 def check_post(data: dict):
-    asyncio.create_task(process_comment(data))
+    return run_task(process_post(data))
+
+
+@celery_app.task
+def check_posts(data: dict):
+    return run_task(process_posts(data))
+
+
+async def process_post(data):
+    moderator.enqueue(ModerationItem("post", data["id"], data["content"]))
+
+
+async def process_posts(data):
+    for item in data["items"]:
+        await process_post(item)
 
 
-async def process_comment(data):
-    response = json.loads(make_request_to_model(data["content"]))
-    if response.get("contain_bad_words"):
-        async for session in get_async_session():
-            repository = PostRepository()
-            await repository.make_instance_inactive(id=data["id"], session=session)
+job_queue.register(check_post.name, process_post)
+job_queue.register(check_posts.name, process_posts)
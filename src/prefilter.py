@@ -0,0 +1,120 @@
+import re
+import unicodedata
+
+from collections import deque
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple
+
+WORD_SUFFIXES = {"", "s", "es", "ed", "er", "ers", "ing"}
+LEET_TRANSLATION = str.maketrans(
+    {"0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t", "@": "a", "$": "s"}
+)
+
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return re.sub(r"\s+", " ", text.translate(LEET_TRANSLATION))
+
+
+class AhoCorasick:
+    def __init__(self, patterns):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for pattern in patterns:
+            self._add(pattern)
+        self._build()
+
+    def _add(self, pattern: str):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(pattern)
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, str]]:
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for pattern in self._output[state]:
+                yield index - len(pattern) + 1, pattern
+
+
+class PrefilterDecision(NamedTuple):
+    verdict: Optional[bool]
+    score: float
+
+
+def load_lexicon(path: str) -> Dict[str, float]:
+    lexicon = {}
+    with open(path, encoding="utf-8") as file:
+        for number, line in enumerate(file, start=1):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            # Only a tab separates the weight, so terms may contain digits
+            term, separator, weight = line.partition("\t")
+            try:
+                weight = float(weight) if separator else 1.0
+            except ValueError:
+                raise ValueError(
+                    f"{path}:{number}: invalid weight {weight!r}"
+                ) from None
+            if not 0 <= weight <= 1:
+                raise ValueError(f"{path}:{number}: weight {weight} is outside [0, 1]")
+            lexicon[normalize(term.strip())] = weight
+    return lexicon
+
+
+class Prefilter:
+    def __init__(
+        self,
+        lexicon: Dict[str, float],
+        block_threshold: float,
+        allow_threshold: Optional[float] = None,
+    ):
+        self.lexicon = lexicon
+        self.block_threshold = block_threshold
+        self.allow_threshold = allow_threshold
+        self.automaton = AhoCorasick(lexicon)
+
+    def score(self, content: str) -> float:
+        text = normalize(content)
+        clean_probability = 1.0
+        for start, term in self.automaton.iter_matches(text):
+            if start > 0 and text[start - 1].isalnum():
+                continue
+            term_end = end = start + len(term)
+            while end < len(text) and text[end].isalnum():
+                end += 1
+            if text[term_end:end] not in WORD_SUFFIXES:
+                continue
+            clean_probability *= 1 - self.lexicon[term]
+        return 1 - clean_probability
+
+    def classify(self, content: str) -> PrefilterDecision:
+        score = self.score(content)
+        if score >= self.block_threshold:
+            return PrefilterDecision(True, score)
+        if self.allow_threshold is not None and score <= self.allow_threshold:
+            return PrefilterDecision(False, score)
+        return PrefilterDecision(None, score)
@@ -0,0 +1,79 @@
+class Row:
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(*row)
+
+
+class UserPostRow(Row):
+    __slots__ = ("id", "username")
+
+
+class PostListRow(Row):
+    __slots__ = (
+        "id",
+        "title",
+        "content",
+        "auto_reply",
+        "reply_text",
+        "is_active",
+        "comment_count",
+        "active_comment_count",
+        "created_at",
+        "updated_at",
+        "user",
+    )
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(*row[:-2], UserPostRow(*row[-2:]))
+
+
+class PostCommentRow(Row):
+    __slots__ = ("id", "title", "created_at", "updated_at", "user")
+
+
+class CommentRow(Row):
+    __slots__ = (
+        "id",
+        "content",
+        "post_id",
+        "parent_id",
+        "user_id",
+        "is_active",
+        "reply_count",
+        "created_at",
+        "updated_at",
+    )
+
+
+class CommentThreadRow(Row):
+    __slots__ = CommentRow.__slots__ + ("replies",)
+
+    def __init__(self, *values):
+        super().__init__(*values)
+        self.replies = []
+
+
+class CommentReadRow(Row):
+    __slots__ = (
+        "id",
+        "content",
+        "is_active",
+        "reply_count",
+        "parent_id",
+        "created_at",
+        "updated_at",
+        "post",
+        "user",
+    )
+
+    @classmethod
+    def from_row(cls, row):
+        post = PostCommentRow(*row[7:11], UserPostRow(*row[11:13]))
+        return cls(*row[:7], post, UserPostRow(*row[13:15]))
@@ -0,0 +1,257 @@
+import asyncio
+import logging
+import math
+import time
+
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import redis.asyncio as redis
+
+from fastapi import HTTPException, status
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from src.auth.auth import Authenticator
+from src.config import settings
+from src.metrics.registry import metrics
+
+logger = logging.getLogger(__name__)
+
+SHED_EXEMPT_PREFIXES = ("/metrics",)
+
+
+class Rule(NamedTuple):
+    capacity: int
+    period: float
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+
+class BucketResult(NamedTuple):
+    allowed: bool
+    remaining: float
+    retry_after: float
+
+
+def parse_rules(value: str) -> Dict[Tuple[str, str], Rule]:
+    rules = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        route, limit = item.rsplit("=", 1)
+        method, path = route.split(None, 1)
+        capacity, period = limit.split("/")
+        rules[(method.upper(), path.strip())] = Rule(int(capacity), float(period))
+    return rules
+
+
+class MemoryBucketStore:
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict = OrderedDict()
+
+    async def take(self, key: str, rule: Rule) -> BucketResult:
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key, (rule.capacity, now))
+        tokens = min(rule.capacity, tokens + (now - updated_at) * rule.rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return BucketResult(allowed, tokens, 0 if allowed else (1 - tokens) / rule.rate)
+
+    def clear(self):
+        self._buckets.clear()
+
+
+TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(state[1]) or capacity
+local updated_at = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisBucketStore:
+    def __init__(self, url: str, prefix: str = "ratelimit"):
+        self.client = redis.from_url(url)
+        self.prefix = prefix
+        self.script = self.client.register_script(TAKE_SCRIPT)
+
+    async def take(self, key: str, rule: Rule) -> BucketResult:
+        try:
+            allowed, tokens = await self.script(
+                keys=[f"{self.prefix}:{key}"], args=[rule.capacity, rule.rate]
+            )
+        except Exception:
+            logger.warning("Rate limit store unavailable", exc_info=True)
+            return BucketResult(True, rule.capacity, 0)
+        tokens = float(tokens)
+        return BucketResult(
+            bool(allowed), tokens, 0 if allowed else (1 - tokens) / rule.rate
+        )
+
+
+class RateLimiter:
+    def __init__(self, store, rules: Dict[Tuple[str, str], Rule], enabled: bool = True):
+        self.store = store
+        self.rules = rules
+        self.enabled = enabled
+
+    @staticmethod
+    async def identity(request: Request) -> str:
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() == "bearer" and token:
+            try:
+                token_data = await Authenticator.decode_token(token)
+            except HTTPException:
+                pass
+            else:
+                return f"user:{token_data.id}"
+        return f"ip:{request.client.host if request.client else 'unknown'}"
+
+    async def check(self, request: Request) -> Optional[Tuple[Rule, BucketResult]]:
+        if not self.enabled:
+            return None
+        rule = self.rules.get((request.method, request.url.path))
+        if rule is None:
+            return None
+
+        key = f"{request.method}:{request.url.path}:{await self.identity(request)}"
+        result = await self.store.take(key, rule)
+        if not result.allowed:
+            metrics.increment("ratelimit.rejected")
+        return rule, result
+
+
+class LoadMonitor:
+    def __init__(self, interval: float, max_loop_lag: float, max_pool_wait: float):
+        self.interval = interval
+        self.max_loop_lag = max_loop_lag
+        self.max_pool_wait = max_pool_wait
+        self.loop_lag = 0.0
+        self.pool_wait = 0.0
+        self._pool_count = 0
+        self._pool_total = 0.0
+        self._task = None
+
+    def overloaded(self) -> Optional[str]:
+        if self.max_loop_lag and self.loop_lag > self.max_loop_lag:
+            return "loop_lag"
+        if self.max_pool_wait and self.pool_wait > self.max_pool_wait:
+            return "pool_wait"
+        return None
+
+    def sample(self, loop_lag: float):
+        self.loop_lag = loop_lag
+        timing = metrics.timing("db.pool.writer.wait_time")
+        checkouts = timing["count"] - self._pool_count
+        waited = timing["total"] - self._pool_total
+        self.pool_wait = waited / checkouts if checkouts > 0 else 0.0
+        self._pool_count, self._pool_total = timing["count"], timing["total"]
+        metrics.set_gauge("load.loop_lag", self.loop_lag)
+        metrics.set_gauge("load.pool_wait", self.pool_wait)
+
+    async def run(self):
+        while True:
+            started_at = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.sample(max(time.perf_counter() - started_at - self.interval, 0.0))
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+class RateLimitMiddleware:
+    def __init__(self, app, limiter: RateLimiter, monitor: LoadMonitor):
+        self.app = app
+        self.limiter = limiter
+        self.monitor = monitor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope)
+        reason = None
+        if not request.url.path.startswith(SHED_EXEMPT_PREFIXES):
+            reason = self.monitor.overloaded()
+        if reason:
+            metrics.increment(f"load.shed.{reason}")
+            response = JSONResponse(
+                {"detail": "Service overloaded"},
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": str(math.ceil(self.monitor.interval))},
+            )
+            await response(scope, receive, send)
+            return
+
+        limited = await self.limiter.check(request)
+        if limited is None:
+            await self.app(scope, receive, send)
+            return
+
+        rule, result = limited
+        headers = {
+            "X-RateLimit-Limit": str(rule.capacity),
+            "X-RateLimit-Remaining": str(math.floor(result.remaining)),
+        }
+        if not result.allowed:
+            headers["Retry-After"] = str(math.ceil(result.retry_after))
+            response = JSONResponse(
+                {"detail": "Too many requests"},
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers=headers,
+            )
+            await response(scope, receive, send)
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).update(headers)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+rate_limiter = RateLimiter(
+    store=(
+        RedisBucketStore(settings.limits.RATE_LIMIT_REDIS_URL)
+        if settings.limits.RATE_LIMIT_REDIS_URL
+        else MemoryBucketStore(max_keys=settings.limits.RATE_LIMIT_MAX_KEYS)
+    ),
+    rules=parse_rules(settings.limits.RATE_LIMIT_RULES),
+    enabled=settings.limits.RATE_LIMIT_ENABLED,
+)
+load_monitor = LoadMonitor(
+    interval=settings.limits.LOAD_MONITOR_INTERVAL,
+    max_loop_lag=settings.limits.LOAD_SHED_LOOP_LAG,
+    max_pool_wait=settings.limits.LOAD_SHED_POOL_WAIT,
+)
@@ -0,0 +1,23 @@
+import asyncio
+import logging
+
+from src.comments.repository import CommentRepository
+from src.dependencies import get_async_session
+
+logger = logging.getLogger(__name__)
+
+
+async def reconcile():
+    async for session in get_async_session():
+        fixed = await CommentRepository().reconcile_counters(session)
+        logger.info(
+            "Reconciled counters on %s posts and %s comments",
+            fixed["posts"],
+            fixed["comments"],
+        )
+        return fixed
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(reconcile())
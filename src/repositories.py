@@ -1,8 +1,11 @@
 from abc import ABC, abstractmethod
 
 from fastapi import HTTPException
-from sqlalchemy import select
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from src.outbox.repository import OutboxRepository
+from src.response_cache import commit_and_invalidate, invalidate_on_commit
 
 
 class AbstractRepository(ABC):
@@ -27,6 +30,7 @@ class AbstractRepository(ABC):
 
 class DBRepository(AbstractRepository):
     model = None
+    moderation_task = None
 
     @abstractmethod
     async def create_instance(self, *args, **kwargs):
@@ -36,29 +40,98 @@ class DBRepository(AbstractRepository):
     async def get_list(self, *args, **kwargs):
         pass
 
+    def cache_tags(self, row) -> set:
+        return set()
+
+    def invalidate(self, rows, session: AsyncSession):
+        tags = set()
+        for row in rows:
+            tags |= self.cache_tags(row)
+        invalidate_on_commit(session, *tags)
+
+    def version_query(self, *criteria):
+        return select(func.max(self.model.updated_at), func.count(self.model.id)).where(
+            *criteria
+        )
+
     async def get_instance(self, id: int, session: AsyncSession):
         result = await session.scalars(select(self.model).where(self.model.id == id))
         return result.one_or_none()
 
-    async def update_instance(self, id: int, data: dict, session: AsyncSession):
-        data = data.model_dump()
-        instance = await self.get_instance(id, session)
-
-        if not instance:
+    async def update_instance(
+        self, id: int, data: dict, session: AsyncSession, user_id: int = None
+    ):
+        values = data.model_dump()
+        stmt = update(self.model).where(self.model.id == id)
+        if user_id is not None:
+            stmt = stmt.where(self.model.user_id == user_id)
+
+        previous, returning = None, [self.model]
+        if self.moderation_task:
+            # Read the previous content alongside the update so moderation is
+            # only enqueued for edits that actually change it
+            if session.bind.dialect.name == "sqlite":
+                # SQLite cannot return columns of UPDATE ... FROM tables
+                previous = await session.scalar(
+                    select(self.model.content).where(self.model.id == id)
+                )
+            else:
+                old = (
+                    select(self.model.id, self.model.content.label("old_content"))
+                    .where(self.model.id == id)
+                    .with_for_update()
+                    .subquery()
+                )
+                stmt = stmt.where(self.model.id == old.c.id)
+                returning.append(old.c.old_content)
+
+        try:
+            result = await session.execute(stmt.values(**values).returning(*returning))
+            row = result.one_or_none()
+        except IntegrityError as exc:
+            await session.rollback()
+            raise self.integrity_error(exc)
+
+        if not row:
             raise HTTPException(status_code=404, detail="Instance not found")
 
-        for key, value in data.items():
-            setattr(instance, key, value)
-
-        session.add(instance)
-        await session.commit()
+        instance = row[0]
+        if len(row) > 1:
+            previous = row[1]
+        if self.moderation_task and instance.content != previous:
+            self.enqueue_moderation(instance, session)
+        self.invalidate([instance], session)
+        await commit_and_invalidate(session)
 
         return instance
 
-    async def delete_instance(self, id: int, session):
-        instance = await self.get_instance(id, session)
-        if not instance:
+    def integrity_error(self, exc: IntegrityError) -> HTTPException:
+        return HTTPException(status_code=400, detail="Invalid data")
+
+    def enqueue_moderation(self, instance, session: AsyncSession):
+        OutboxRepository.add(
+            session,
+            self.moderation_task,
+            {"id": instance.id, "content": instance.content},
+        )
+
+    async def delete_instance(self, id: int, session, user_id: int = None):
+        stmt = delete(self.model).where(self.model.id == id)
+        if user_id is not None:
+            stmt = stmt.where(self.model.user_id == user_id)
+        row = (await session.execute(stmt.returning(self.model.id))).one_or_none()
+        if row is None:
             raise HTTPException(status_code=404, detail="Instance not found")
 
-        await session.delete(instance)
-        await session.commit()
+        self.invalidate([row], session)
+        await commit_and_invalidate(session)
+
+    async def make_instances_inactive(self, ids: list, session: AsyncSession):
+        stmt = (
+            update(self.model)
+            .where(self.model.id.in_(ids), self.model.is_active.is_(True))
+            .values(is_active=False)
+            .returning(self.model.id)
+        )
+        self.invalidate((await session.execute(stmt)).all(), session)
+        await commit_and_invalidate(session)
@@ -0,0 +1,341 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import weakref
+
+from collections import Counter, OrderedDict
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, Iterable, NamedTuple, Optional, Set
+
+import redis.asyncio as redis
+
+from fastapi import Request, Response, status
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from src.cache import MemoryCache
+from src.conditional import is_not_modified
+from src.config import settings
+from src.metrics.registry import metrics
+
+logger = logging.getLogger(__name__)
+
+POSTS_TAG = "posts"
+USERS_TAG = "users"
+CACHED_HEADERS = ("content-type", "etag", "last-modified")
+INVALIDATE_SCRIPT = """
+local version = redis.call("INCR", KEYS[1])
+for i = 2, #KEYS do
+    redis.call("SET", KEYS[i], version)
+end
+return version
+"""
+
+
+def post_tag(post_id: int) -> str:
+    return f"post:{post_id}"
+
+
+def user_tag(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+class CacheEntry(NamedTuple):
+    body: bytes
+    headers: Dict[str, str]
+    versions: Dict[str, int]
+
+    def encode(self) -> bytes:
+        meta = json.dumps({"headers": self.headers, "versions": self.versions})
+        return meta.encode() + b"\n" + self.body
+
+    @classmethod
+    def decode(cls, value: bytes) -> "CacheEntry":
+        meta, body = value.split(b"\n", 1)
+        meta = json.loads(meta)
+        return cls(body, meta["headers"], meta["versions"])
+
+
+class MemoryResponseBackend:
+    def __init__(self, max_size: int, max_tags: int):
+        self.entries = MemoryCache(max_size=max_size, ttl=0)
+        self.max_tags = max_tags
+        self.tags: OrderedDict = OrderedDict()
+        self.evicted = 0
+        self.clock = 0
+        self._locks = weakref.WeakValueDictionary()
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        return self.entries.get(key)
+
+    async def set(self, key: str, entry: CacheEntry, ttl: int):
+        self.entries.set(key, entry, ttl)
+
+    async def version(self) -> int:
+        return self.clock
+
+    async def versions(self, tags: Iterable[str]) -> Dict[str, int]:
+        return {tag: self.tags.get(tag, self.evicted) for tag in tags}
+
+    async def invalidate(self, tags: Iterable[str]):
+        # Versions come from one clock and evicted tags report the newest
+        # evicted version, so forgetting a tag can only turn a hit into a miss
+        for tag in tags:
+            self.clock += 1
+            self.tags[tag] = self.clock
+            self.tags.move_to_end(tag)
+        while len(self.tags) > self.max_tags:
+            _, version = self.tags.popitem(last=False)
+            self.evicted = max(self.evicted, version)
+
+    @asynccontextmanager
+    async def lock(self, key: str, timeout: float):
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        try:
+            await asyncio.wait_for(lock.acquire(), timeout)
+        except asyncio.TimeoutError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            lock.release()
+
+    def clear(self):
+        self.entries.clear()
+        self.tags.clear()
+        self.evicted = 0
+        self.clock = 0
+
+
+class RedisResponseBackend:
+    def __init__(self, url: str, prefix: str = "response"):
+        self.client = redis.from_url(url)
+        self.prefix = prefix
+
+    def _key(self, kind: str, key: str) -> str:
+        return f"{self.prefix}:{kind}:{key}"
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        try:
+            value = await self.client.get(self._key("entry", key))
+        except Exception:
+            logger.warning("Response cache read failed", exc_info=True)
+            return None
+        return CacheEntry.decode(value) if value is not None else None
+
+    async def set(self, key: str, entry: CacheEntry, ttl: int):
+        try:
+            await self.client.set(self._key("entry", key), entry.encode(), ex=ttl)
+        except Exception:
+            logger.warning("Response cache write failed", exc_info=True)
+
+    async def version(self) -> Optional[int]:
+        try:
+            value = await self.client.get(self._key("clock", "tags"))
+        except Exception:
+            logger.warning("Response cache read failed", exc_info=True)
+            return None
+        return int(value or 0)
+
+    async def versions(self, tags: Iterable[str]) -> Optional[Dict[str, int]]:
+        tags = list(tags)
+        if not tags:
+            return {}
+        try:
+            values = await self.client.mget([self._key("tag", tag) for tag in tags])
+        except Exception:
+            logger.warning("Response cache read failed", exc_info=True)
+            return None
+        return {tag: int(value or 0) for tag, value in zip(tags, values)}
+
+    async def invalidate(self, tags: Iterable[str]):
+        # Tags take their version from one shared clock, like the memory
+        # backend, so fill() can tell whether a tag moved after its snapshot
+        keys = [self._key("tag", tag) for tag in tags]
+        if not keys:
+            return
+        try:
+            await self.client.eval(
+                INVALIDATE_SCRIPT, len(keys) + 1, self._key("clock", "tags"), *keys
+            )
+        except Exception:
+            logger.warning("Response cache invalidation failed", exc_info=True)
+
+    @asynccontextmanager
+    async def lock(self, key: str, timeout: float):
+        lock = self.client.lock(
+            self._key("lock", key), timeout=timeout, blocking_timeout=timeout
+        )
+        try:
+            acquired = await lock.acquire()
+        except Exception:
+            logger.warning("Response cache lock failed", exc_info=True)
+            acquired = False
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                try:
+                    await lock.release()
+                except Exception:
+                    pass
+
+
+class ResponseCache:
+    def __init__(self, backend, ttl: int, lock_timeout: float, enabled: bool = True):
+        self.backend = backend
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self.enabled = enabled
+        self.outcomes = Counter()
+
+    @staticmethod
+    def key(request: Request) -> str:
+        query = sorted(request.query_params.multi_items())
+        raw = json.dumps([request.url.path, query])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def cacheable(self, request: Request) -> bool:
+        return (
+            self.enabled
+            and request.method == "GET"
+            and "authorization" not in request.headers
+        )
+
+    async def serve(
+        self,
+        request: Request,
+        build: Callable[[Set[str]], Awaitable[Response]],
+        tags: Iterable[str] = (),
+    ) -> Response:
+        if not self.cacheable(request):
+            return await build(set())
+
+        started_at = time.perf_counter()
+        key = self.key(request)
+        entry = await self.lookup(key)
+        if entry is None:
+            async with self.backend.lock(key, self.lock_timeout) as acquired:
+                if not acquired:
+                    metrics.increment("response_cache.lock_timeouts")
+                entry = await self.lookup(key)
+                if entry is None:
+                    response = await self.fill(key, build, set(tags))
+                    self.record("miss", started_at)
+                    return response
+
+        self.record("hit", started_at)
+        return self.replay(request, entry)
+
+    async def lookup(self, key: str) -> Optional[CacheEntry]:
+        entry = await self.backend.get(key)
+        if entry is None:
+            return None
+        if await self.backend.versions(entry.versions) != entry.versions:
+            metrics.increment("response_cache.stale")
+            return None
+        return entry
+
+    async def fill(
+        self,
+        key: str,
+        build: Callable[[Set[str]], Awaitable[Response]],
+        tags: Set[str],
+    ) -> Response:
+        # Versions of the tags known up front are read before the query runs,
+        # so a write that lands while the page is built invalidates the entry.
+        # Tags found while building are only known afterwards, so the clock is
+        # snapshotted instead and the page is not stored if any moved past it
+        versions = await self.backend.versions(tags)
+        clock = await self.backend.version()
+        extra = set()
+        response = await build(extra)
+        response.headers["X-Cache"] = "MISS"
+        if response.status_code != status.HTTP_200_OK or None in (versions, clock):
+            return response
+
+        extra_versions = await self.backend.versions(extra - tags)
+        if extra_versions is None:
+            return response
+        if any(version > clock for version in extra_versions.values()):
+            metrics.increment("response_cache.raced")
+            return response
+        headers = {
+            name: response.headers[name]
+            for name in CACHED_HEADERS
+            if name in response.headers
+        }
+        entry = CacheEntry(response.body, headers, {**versions, **extra_versions})
+        await self.backend.set(key, entry, self.ttl)
+        return response
+
+    @staticmethod
+    def replay(request: Request, entry: CacheEntry) -> Response:
+        headers = entry.headers
+        last_modified = headers.get("last-modified")
+        if last_modified is not None:
+            last_modified = parsedate_to_datetime(last_modified)
+        if "etag" in headers and is_not_modified(
+            request, headers["etag"], last_modified
+        ):
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={
+                    name: value
+                    for name, value in headers.items()
+                    if name != "content-type"
+                },
+            )
+        return Response(entry.body, headers={**headers, "X-Cache": "HIT"})
+
+    def record(self, outcome: str, started_at: float):
+        self.outcomes[outcome] += 1
+        metrics.increment(f"response_cache.{outcome}")
+        metrics.observe(
+            f"response_cache.{outcome}_time", time.perf_counter() - started_at
+        )
+        metrics.set_gauge(
+            "response_cache.hit_ratio",
+            self.outcomes["hit"] / (self.outcomes["hit"] + self.outcomes["miss"]),
+        )
+
+    async def invalidate(self, tags: Iterable[str]):
+        tags = set(tags)
+        metrics.increment("response_cache.invalidations", len(tags))
+        await self.backend.invalidate(tags)
+
+
+def invalidate_on_commit(session, *tags: str):
+    session.info.setdefault("cache_tags", set()).update(tags)
+
+
+async def commit_and_invalidate(session):
+    await session.commit()
+    tags = session.info.pop("cache_tags", None)
+    if tags:
+        await response_cache.invalidate(tags)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def discard_rolled_back(session, previous_transaction):
+    session.info.pop("cache_tags", None)
+
+
+response_cache = ResponseCache(
+    backend=(
+        RedisResponseBackend(settings.cache.RESPONSE_CACHE_REDIS_URL)
+        if settings.cache.RESPONSE_CACHE_REDIS_URL
+        else MemoryResponseBackend(
+            max_size=settings.cache.RESPONSE_CACHE_SIZE,
+            max_tags=settings.cache.RESPONSE_CACHE_MAX_TAGS,
+        )
+    ),
+    ttl=settings.cache.RESPONSE_CACHE_TTL,
+    lock_timeout=settings.cache.RESPONSE_CACHE_LOCK_TIMEOUT,
+    enabled=settings.cache.RESPONSE_CACHE_ENABLED,
+)
@@ -0,0 +1,104 @@
+from functools import lru_cache, partial
+from typing import Any, Callable, List, Optional, Union, get_args, get_origin
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+from pydantic_core import to_json
+from src.config import settings
+
+
+class PydanticJSONResponse(Response):
+    media_type = "application/json"
+
+    def __init__(self, content: Any, adapter: Optional[TypeAdapter] = None, **kwargs):
+        self.adapter = adapter
+        super().__init__(content, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        if self.adapter is None:
+            return to_json(content)
+        return self.adapter.dump_json(content)
+
+
+@lru_cache(maxsize=None)
+def get_adapter(schema) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+
+readers = {}
+
+
+def get_reader(schema) -> Optional[Callable[[Any], Any]]:
+    """Compile a function that copies the schema's fields off trusted rows.
+
+    Returns None for leaf types, which are serialized as they are.
+    """
+    if schema not in readers:
+        readers[schema] = compile_reader(schema)
+    return readers[schema]
+
+
+def compile_reader(schema) -> Optional[Callable[[Any], Any]]:
+    origin = get_origin(schema)
+    if origin in (list, List):
+        item = get_reader(get_args(schema)[0])
+        if item is None:
+            return None
+        return lambda values: [item(value) for value in values]
+    if origin is Union:
+        args = [get_reader(arg) for arg in get_args(schema) if arg is not type(None)]
+        if len(args) != 1 or args[0] is None:
+            return None
+        reader = args[0]
+        return lambda value: None if value is None else reader(value)
+    if not (isinstance(schema, type) and issubclass(schema, BaseModel)):
+        return None
+
+    fields = []
+
+    def read(row) -> dict:
+        get = row.get if isinstance(row, dict) else partial(getattr, row)
+        values = {}
+        for name, reader, default in fields:
+            value = get(name, default)
+            values[name] = value if reader is None else reader(value)
+        return values
+
+    # Registered before the fields are compiled so self-referencing schemas
+    # such as CommentThread resolve to this reader
+    readers[schema] = read
+    fields.extend(
+        (
+            name,
+            get_reader(field.annotation),
+            field.get_default(call_default_factory=True),
+        )
+        for name, field in schema.model_fields.items()
+    )
+    return read
+
+
+def fast_response(
+    schema,
+    data: Any,
+    response: Optional[Response] = None,
+    validate: Optional[bool] = None,
+) -> PydanticJSONResponse:
+    if validate is None:
+        validate = settings.RESPONSE_VALIDATION
+    if validate:
+        adapter = get_adapter(schema)
+        content = adapter.validate_python(data, from_attributes=True)
+    else:
+        # Rows come straight from our own queries, so they are copied into
+        # plain containers and dumped without a validation pass
+        adapter, reader = None, get_reader(schema)
+        content = data if reader is None else reader(data)
+    headers = None
+    if response is not None:
+        headers = {
+            key: value
+            for key, value in response.headers.items()
+            if key != "content-length"
+        }
+    return PydanticJSONResponse(content, adapter, headers=headers)
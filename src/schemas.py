@@ -1,7 +1,28 @@
 from datetime import datetime
+from typing import Generic, List, Optional, TypeVar
 from pydantic import BaseModel
 
+T = TypeVar("T")
+
 
 class BaseInstance(BaseModel):
     created_at: datetime
     updated_at: datetime
+
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    errors: Optional[List[dict]] = None
+
+
+class BulkResult(BaseModel):
+    created: int
+    failed: int
+    results: List[BulkItemResult]
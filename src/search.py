@@ -0,0 +1,107 @@
+from abc import ABC, abstractmethod
+
+from fastapi import HTTPException, status
+from sqlalchemy import DDL, column, event, func, literal_column, table
+
+SEARCH_LANGUAGE = "english"
+
+
+def clean_query(query: str) -> str:
+    query = query.strip()
+    if not query:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Search query must not be blank",
+        )
+    return query
+
+
+class SearchBackend(ABC):
+    @abstractmethod
+    def apply(self, stmt, model, query: str):
+        pass
+
+
+class PostgresSearchBackend(SearchBackend):
+    @staticmethod
+    def document(model):
+        document = None
+        for name in model.__searchable__:
+            field = getattr(model, name)
+            document = (
+                field
+                if document is None
+                else document.op("||")(literal_column("' '")).op("||")(field)
+            )
+        return func.to_tsvector(
+            literal_column(f"'{SEARCH_LANGUAGE}'::regconfig"), document
+        )
+
+    def apply(self, stmt, model, query: str):
+        document = self.document(model)
+        tsquery = func.websearch_to_tsquery(
+            literal_column(f"'{SEARCH_LANGUAGE}'::regconfig"), query
+        )
+        return stmt.where(document.op("@@")(tsquery)).order_by(
+            func.ts_rank(document, tsquery).desc(), model.id.desc()
+        )
+
+
+class SqliteSearchBackend(SearchBackend):
+    @staticmethod
+    def escape(query: str) -> str:
+        terms = ['"' + term.replace('"', '""') + '"' for term in query.split()]
+        return " ".join(terms)
+
+    def apply(self, stmt, model, query: str):
+        fts_name = f"{model.__tablename__}_fts"
+        fts = table(fts_name, column("rowid"))
+        return (
+            stmt.join(fts, fts.c.rowid == model.id)
+            .where(literal_column(fts_name).op("MATCH")(self.escape(query)))
+            .order_by(func.bm25(literal_column(fts_name)), model.id.desc())
+        )
+
+
+backends = {
+    "postgresql": PostgresSearchBackend(),
+    "sqlite": SqliteSearchBackend(),
+}
+
+
+def get_search_backend(session) -> SearchBackend:
+    return backends[session.bind.dialect.name]
+
+
+def enable_sqlite_fts(model):
+    name = model.__tablename__
+    fts_name = f"{name}_fts"
+    fields = ", ".join(model.__searchable__)
+    new_values = ", ".join(f"new.{field}" for field in model.__searchable__)
+    old_values = ", ".join(f"old.{field}" for field in model.__searchable__)
+    insert_new = (
+        f"INSERT INTO {fts_name}(rowid, {fields}) VALUES (new.id, {new_values});"
+    )
+    delete_old = (
+        f"INSERT INTO {fts_name}({fts_name}, rowid, {fields}) "
+        f"VALUES ('delete', old.id, {old_values});"
+    )
+    statements = [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_name} USING fts5("
+        f"{fields}, content='{name}', content_rowid='id')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_name}_ai AFTER INSERT ON {name} "
+        f"BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_name}_ad AFTER DELETE ON {name} "
+        f"BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_name}_au AFTER UPDATE ON {name} "
+        f"BEGIN {delete_old} {insert_new} END",
+    ]
+    for statement in statements:
+        event.listen(
+            model.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite")
+        )
+    event.listen(
+        model.__table__,
+        "after_drop",
+        DDL(f"DROP TABLE IF EXISTS {fts_name}").execute_if(dialect="sqlite"),
+    )
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import threading
+
+from celery.signals import worker_process_init, worker_process_shutdown
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from src.config import settings
+from src.database import DATABASE_URL
+from src.dependencies import get_async_session
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerRuntime:
+    def __init__(self, database_url: str, max_concurrency: int, **engine_options):
+        self.database_url = database_url
+        self.max_concurrency = max_concurrency
+        self.engine_options = engine_options
+        self.loop = None
+        self.engine = None
+        self.session_maker = None
+        self.on_shutdown = []
+        self._thread = None
+        self._semaphore = None
+        self._lock = threading.Lock()
+
+    @property
+    def started(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        with self._lock:
+            if self.started:
+                return
+            self.loop = asyncio.new_event_loop()
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self.engine = create_async_engine(self.database_url, **self.engine_options)
+            self.session_maker = sessionmaker(
+                bind=self.engine, class_=AsyncSession, expire_on_commit=False
+            )
+            self._thread = threading.Thread(
+                target=self.loop.run_forever, name="worker-loop", daemon=True
+            )
+            self._thread.start()
+            logger.info("Worker event loop started")
+
+    def stop(self):
+        with self._lock:
+            if not self.started:
+                return
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join()
+            self.loop.close()
+            self._thread = None
+            logger.info("Worker event loop stopped")
+
+    async def _shutdown(self):
+        for callback in self.on_shutdown:
+            await callback()
+        await self.engine.dispose()
+
+    def is_current(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    def run(self, coro):
+        self.start()
+        return asyncio.run_coroutine_threadsafe(self._bounded(coro), self.loop).result()
+
+    async def _bounded(self, coro):
+        async with self._semaphore:
+            return await coro
+
+
+runtime = WorkerRuntime(
+    DATABASE_URL,
+    max_concurrency=settings.celery.CELERY_TASK_CONCURRENCY,
+    pool_size=settings.celery.CELERY_DB_POOL_SIZE,
+    max_overflow=settings.celery.CELERY_DB_MAX_OVERFLOW,
+    pool_pre_ping=True,
+)
+background_tasks = set()
+
+
+async def get_task_session():
+    if runtime.is_current():
+        async with runtime.session_maker() as session:
+            yield session
+    else:
+        async for session in get_async_session():
+            yield session
+
+
+def run_task(coro):
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return runtime.run(coro)
+
+    task = loop.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+
+@worker_process_init.connect
+def start_runtime(**kwargs):
+    runtime.start()
+
+
+@worker_process_shutdown.connect
+def stop_runtime(**kwargs):
+    runtime.stop()
@@ -1,13 +1,19 @@
 import pytest
 
+from functools import partial
 from httpx import AsyncClient
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.pool import NullPool
 from starlette.testclient import TestClient
+from src.config import settings
 from src.database import metadata, Base
 from main import app
-from src.dependencies import get_async_session
+from src.dependencies import get_async_session, get_read_session
+from src.genai import ModerationBackend
+from src.moderation import deactivate_flagged, defer_unmoderated, moderator
+from src.prefilter import Prefilter
+from src.ratelimit import rate_limiter
 
 DATABASE_URL = "sqlite+aiosqlite:///./testsql_app.db"
 test_engine = create_async_engine(DATABASE_URL, poolclass=NullPool)
@@ -23,6 +29,31 @@ async def override_get_async_session():
 
 
 app.dependency_overrides[get_async_session] = override_get_async_session
+app.dependency_overrides[get_read_session] = override_get_async_session
+
+
+class FakeModerationBackend(ModerationBackend):
+    banned_words = ("badword",)
+
+    def __init__(self):
+        self.calls = []
+
+    async def moderate(self, items):
+        self.calls.append(items)
+        return {
+            item.key: any(word in item.content.lower() for word in self.banned_words)
+            for item in items
+        }
+
+
+moderator.backend.backend = FakeModerationBackend()
+moderator.prefilter = Prefilter({"badword": 0.5, "obscenity": 1.0}, block_threshold=0.9)
+rate_limiter.enabled = False
+settings.METRICS_PUBLIC = True
+moderator.handler = partial(
+    deactivate_flagged, session_factory=override_get_async_session
+)
+moderator.defer = partial(defer_unmoderated, session_factory=override_get_async_session)
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -30,8 +61,10 @@ async def prepare_database():
     async with test_engine.begin() as connection:
         await connection.run_sync(Base.metadata.create_all)
     yield
-    async with test_engine.begin() as connection:
+    async with test_engine.connect() as connection:
+        await connection.exec_driver_sql("PRAGMA foreign_keys=OFF")
         await connection.run_sync(Base.metadata.drop_all)
+        await connection.commit()
 
 
 client = TestClient(app)
@@ -1,9 +1,11 @@
 import pytest
 from datetime import date
-from sqlalchemy import insert, delete
+from sqlalchemy import insert, delete, select
+from src.analytics.repository import CommentStatsRepository
 from src.auth.hasher import hasher
 from src.auth.models import User
 from src.comments.models import Comment
+from src.comments.repository import CommentRepository
 from src.posts.models import Post
 from tests.conftest import TestingSessionLocal, client
 
@@ -73,18 +75,34 @@ async def add_post_and_comments(add_user):
             )
             await session.execute(new_comment)
         await session.commit()
+        await CommentStatsRepository().rebuild(session)
         return post_id
 
 
+def totals(series):
+    return {
+        key: sum(day[key] for day in series)
+        for key in ("total_comments", "active_comments", "blocked_comments")
+    }
+
+
 def test_get_analytics_success(add_post_and_comments):
     response = client.get(
         "/analytics/comments-daily-breakdown",
     )
     assert response.status_code == 200
     response_data = response.json()
-    assert response_data.get("total_comments", 0) == 4
-    assert response_data.get("active_comments", 0) == 2
-    assert response_data.get("blocked_comments", 0) == 2
+    assert [day["day"] for day in response_data] == [
+        "2024-10-10",
+        "2024-10-15",
+        "2024-10-17",
+        "2024-10-20",
+    ]
+    assert totals(response_data) == {
+        "total_comments": 4,
+        "active_comments": 2,
+        "blocked_comments": 2,
+    }
 
 
 def test_get_analytics_date_from():
@@ -93,9 +111,12 @@ def test_get_analytics_date_from():
     )
     assert response.status_code == 200
     response_data = response.json()
-    assert response_data.get("total_comments", 0) == 3
-    assert response_data.get("active_comments", 0) == 1
-    assert response_data.get("blocked_comments", 0) == 2
+    assert len(response_data) == 3
+    assert totals(response_data) == {
+        "total_comments": 3,
+        "active_comments": 1,
+        "blocked_comments": 2,
+    }
 
 
 def test_get_analytics_date_to():
@@ -104,9 +125,12 @@ def test_get_analytics_date_to():
     )
     assert response.status_code == 200
     response_data = response.json()
-    assert response_data.get("total_comments", 0) == 1
-    assert response_data.get("active_comments", 0) == 1
-    assert response_data.get("blocked_comments", 0) == 0
+    assert len(response_data) == 2
+    assert totals(response_data) == {
+        "total_comments": 2,
+        "active_comments": 1,
+        "blocked_comments": 1,
+    }
 
 
 def test_get_analytics_date_to_date_from():
@@ -115,6 +139,63 @@ def test_get_analytics_date_to_date_from():
     )
     assert response.status_code == 200
     response_data = response.json()
-    assert response_data.get("total_comments", 0) == 2
-    assert response_data.get("active_comments", 0) == 0
-    assert response_data.get("blocked_comments", 0) == 2
+    assert len(response_data) == 3
+    assert totals(response_data) == {
+        "total_comments": 3,
+        "active_comments": 1,
+        "blocked_comments": 2,
+    }
+
+
+async def test_get_analytics_after_moderation():
+    async with TestingSessionLocal() as session:
+        comment = await session.scalar(
+            select(Comment).where(Comment.content == first_comment["content"])
+        )
+        await CommentRepository().make_instances_inactive([comment.id], session)
+
+    response = client.get(
+        "/analytics/comments-daily-breakdown?date_from=2024-10-20&date_to=2024-10-20",
+    )
+    assert response.status_code == 200
+    assert response.json() == [
+        {
+            "day": "2024-10-20",
+            "total_comments": 1,
+            "active_comments": 0,
+            "blocked_comments": 1,
+        }
+    ]
+
+
+async def test_get_analytics_after_deleting_subtree():
+    async with TestingSessionLocal() as session:
+        parent = await session.scalar(
+            select(Comment).where(Comment.content == last_comment["content"])
+        )
+        await session.execute(
+            insert(Comment).values(
+                content="reply",
+                is_active=False,
+                created_at=last_comment["created_at"],
+                user_id=parent.user_id,
+                post_id=parent.post_id,
+                parent_id=parent.id,
+            )
+        )
+        await session.commit()
+        await CommentStatsRepository().rebuild(session)
+        await CommentRepository().delete_instance(parent.id, session)
+
+    response = client.get(
+        "/analytics/comments-daily-breakdown?date_from=2024-10-10&date_to=2024-10-10",
+    )
+    assert response.status_code == 200
+    assert response.json() == [
+        {
+            "day": "2024-10-10",
+            "total_comments": 0,
+            "active_comments": 0,
+            "blocked_comments": 0,
+        }
+    ]
@@ -212,3 +212,43 @@ def test_refresh_token_invalid():
         "users/refresh?token=khgvkuyglisdu`ghfpi.s`defoegge`rdg.`ergae`rggdszf"
     )
     assert response.status_code == 401
+
+
+def test_hasher_metrics_recorded():
+    user_data = {"username": "username12", "password": "StrongPass1!"}
+    client.post("/users/token", data=user_data)
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    timings = response.json()["timings"]
+    assert timings["hasher.hash_time"]["count"] > 0
+    assert "hasher.queue_wait" in timings
+
+
+def test_token_cache_hit_on_repeated_requests():
+    user_data = {"username": "username12", "password": "StrongPass1!"}
+    login_response = client.post("/users/token", data=user_data)
+    headers = {"Authorization": f"Bearer {login_response.json().get('access')}"}
+
+    client.get("/users/me", headers=headers)
+    hits_before = client.get("/metrics").json()["counters"].get(
+        "auth.token_cache.hit", 0
+    )
+    response = client.get("/users/me", headers=headers)
+    assert response.status_code == 200
+
+    hits_after = client.get("/metrics").json()["counters"]["auth.token_cache.hit"]
+    assert hits_after == hits_before + 1
+
+
+def test_read_users_me_conditional():
+    user_data = {"username": "username12", "password": "StrongPass1!"}
+    login_response = client.post("/users/token", data=user_data)
+    headers = {"Authorization": f"Bearer {login_response.json().get('access')}"}
+
+    response = client.get("/users/me", headers=headers)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    response = client.get("/users/me", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
@@ -1,9 +1,16 @@
 import pytest
 
-from sqlalchemy import insert, select
+from datetime import datetime, timedelta
+from typing import List
+from sqlalchemy import func, insert, select, update
 from src.auth.hasher import hasher
 from src.auth.models import User
+from src.comments.models import Comment
+from src.comments.repository import CommentRepository
+from src.comments.schemas import CommentThread
+from src.outbox.models import OutboxMessage
 from src.posts.models import Post
+from src.responses import fast_response
 from tests.conftest import TestingSessionLocal, client
 
 userdata = {
@@ -53,7 +60,7 @@ def test_create_comment_success(add_user, add_post):
         "/posts/my",
         headers={"Authorization": f"Bearer {login_response_data.get('access')}"},
     )
-    post_id = int(post_response.json()[0]["id"])
+    post_id = int(post_response.json()["items"][0]["id"])
     comment_data["post_id"] = post_id
 
     response = client.post(
@@ -63,6 +70,9 @@ def test_create_comment_success(add_user, add_post):
     )
     assert response.status_code == 200
 
+    stats = client.get(f"/analytics/comments-daily-breakdown?post_id={post_id}")
+    assert sum(day["total_comments"] for day in stats.json()) == 1
+
 
 def test_create_comment_unauthorized(add_post):
     post_id = add_post
@@ -101,7 +111,7 @@ def test_create_comment_with_invalid_parent():
         "/posts/my",
         headers={"Authorization": f"Bearer {login_response_data.get('access')}"},
     )
-    post_id = int(post_response.json()[0]["id"])
+    post_id = int(post_response.json()["items"][0]["id"])
     comment_data["post_id"] = post_id
     comment_data["parent_id"] = 1008
 
@@ -129,7 +139,55 @@ def test_get_list_comments_success(add_post):
 
     response = client.get(f"/comments?post_id={post_id}")
     assert response.status_code == 200
-    assert len(response.json()) == 1
+    assert len(response.json()["items"]) == 1
+
+
+def test_create_comments_bulk(add_post):
+    post_id = add_post
+    user_data = {"username": userdata["username"], "password": userdata["password"]}
+    login_response = client.post("/users/token", data=user_data)
+    headers = {"Authorization": f"Bearer {login_response.json().get('access')}"}
+    items = [
+        {"content": "Bulk first", "post_id": post_id},
+        {"content": "Bulk orphan", "post_id": 100000},
+        {"content": "Bulk reply", "post_id": post_id, "parent_id": 100000},
+        "not a comment",
+        {"content": "Bulk second", "post_id": post_id},
+    ]
+
+    response = client.post("/comments/bulk", headers=headers, json=items)
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["created"], data["failed"]) == (2, 3)
+    results = data["results"]
+    assert results[1]["errors"][0]["loc"] == ["post_id"]
+    assert results[2]["errors"][0]["loc"] == ["parent_id"]
+    assert results[3]["errors"]
+
+    response = client.get(f"/comments?post_id={post_id}")
+    contents = [comment["content"] for comment in response.json()["items"]]
+    assert contents == ["Bulk second", "Bulk first"]
+
+
+def test_get_list_comments_since(add_post):
+    post_id = add_post
+    user_data = {"username": userdata["username"], "password": userdata["password"]}
+    login_response = client.post("/users/token", data=user_data)
+    headers = {"Authorization": f"Bearer {login_response.json().get('access')}"}
+
+    client.post(
+        "/comments", headers=headers, json={"content": "First", "post_id": post_id}
+    )
+    response = client.get(f"/comments?post_id={post_id}")
+    since = response.json()["prev_cursor"]
+
+    client.post(
+        "/comments", headers=headers, json={"content": "Second", "post_id": post_id}
+    )
+    response = client.get("/comments", params={"post_id": post_id, "since": since})
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert [comment["content"] for comment in items] == ["Second"]
 
 
 def test_personal_comments():
@@ -141,7 +199,7 @@ def test_personal_comments():
         headers={"Authorization": f"Bearer {login_response_data.get('access')}"},
     )
     assert response.status_code == 200
-    for comment in response.json():
+    for comment in response.json()["items"]:
         assert comment["user"]["username"] == user_data["username"]
 
 
@@ -150,7 +208,34 @@ def test_personal_comment_unathorized():
     assert response.status_code == 401
 
 
-def test_update_comment_success(add_post):
+async def test_comment_lists_are_projected():
+    user_data = {"username": userdata["username"], "password": userdata["password"]}
+    login_response = client.post("/users/token", data=user_data)
+    headers = {"Authorization": f"Bearer {login_response.json().get('access')}"}
+    repository = CommentRepository()
+    async with TestingSessionLocal() as session:
+        post_id = await session.scalar(select(func.min(Post.id)))
+    client.post("/comments", headers=headers, json={"content": "A", "post_id": post_id})
+
+    async with TestingSessionLocal() as session:
+        user_id = await session.scalar(
+            select(User.id).where(User.username == userdata["username"])
+        )
+        page = await repository.get_list(session, post_id=post_id)
+        assert page["items"]
+        assert all(comment.post_id == post_id for comment in page["items"])
+
+        page = await repository.get_user_list(session, user_id=user_id)
+        assert page["items"]
+        for comment in page["items"]:
+            assert comment.user.id == user_id
+            assert comment.post.title
+            assert comment.post.user.username
+            assert not hasattr(comment, "__dict__")
+        assert len(session.identity_map) == 0
+
+
+async def test_update_comment_success(add_post):
     post_id = add_post
     comment_data = {
         "content": "My Test Comment",
@@ -177,6 +262,174 @@ def test_update_comment_success(add_post):
     assert response.status_code == 200
     assert response.json().get("content") == new_content["content"]
 
+    response = client.put(
+        f"/comments/{comment_id}",
+        headers={"Authorization": f"Bearer {login_response_data.get('access')}"},
+        json=new_content,
+    )
+    assert response.status_code == 200
+
+    async with TestingSessionLocal() as session:
+        messages = await session.scalars(
+            select(OutboxMessage.payload).where(
+                OutboxMessage.task == "src.comments.tasks.check_comment"
+            )
+        )
+        assert [
+            message["content"] for message in messages if message["id"] == comment_id
+        ] == ["My Test Comment", "New"]
+
+
+@pytest.fixture
+async def add_thread(add_post):
+    post_id = add_post
+    started_at = datetime(2024, 1, 1)
+    async with TestingSessionLocal() as session:
+        user = (
+            await session.scalars(select(User).where(User.username == "user"))
+        ).first()
+        ids = {}
+        tree = [
+            ("a", None),
+            ("b", None),
+            ("a1", "a"),
+            ("a2", "a"),
+            ("a3", "a"),
+            ("a1x", "a1"),
+            ("a3x", "a3"),
+        ]
+        for offset, (name, parent) in enumerate(tree):
+            result = await session.execute(
+                insert(Comment).values(
+                    content=name,
+                    post_id=post_id,
+                    user_id=user.id,
+                    parent_id=ids.get(parent),
+                    created_at=started_at + timedelta(minutes=offset),
+                )
+            )
+            ids[name] = result.inserted_primary_key[0]
+        await session.commit()
+    return post_id, ids
+
+
+def contents(nodes):
+    return [(node["content"], contents(node["replies"])) for node in nodes]
+
+
+async def test_get_comment_thread(add_thread):
+    post_id, ids = add_thread
+
+    response = client.get(f"/comments/thread?post_id={post_id}&depth=2&limit=2")
+    assert response.status_code == 200
+    assert contents(response.json()) == [("a", [("a1", []), ("a2", [])]), ("b", [])]
+
+    response = client.get(f"/comments/thread?post_id={post_id}")
+    assert contents(response.json()) == [
+        ("a", [("a1", [("a1x", [])]), ("a2", []), ("a3", [("a3x", [])])]),
+        ("b", []),
+    ]
+
+    response = client.get(f"/comments/thread?post_id={post_id}&limit=2")
+    assert contents(response.json()) == [
+        ("a", [("a1", [("a1x", [])]), ("a2", [])]),
+        ("b", []),
+    ]
+
+    response = client.get(f"/comments/thread?post_id={post_id}&parent_id={ids['a']}")
+    assert contents(response.json()) == [
+        ("a1", [("a1x", [])]),
+        ("a2", []),
+        ("a3", [("a3x", [])]),
+    ]
+
+    async with TestingSessionLocal() as session:
+        thread = await CommentRepository().get_thread(session, post_id=post_id)
+    fast = fast_response(List[CommentThread], thread, validate=False)
+    validated = fast_response(List[CommentThread], thread, validate=True)
+    assert fast.body == validated.body
+
+
+async def test_delete_cascades_through_thread(add_thread):
+    post_id, ids = add_thread
+    user_data = {"username": userdata["username"], "password": userdata["password"]}
+    login_response = client.post("/users/token", data=user_data)
+    headers = {"Authorization": f"Bearer {login_response.json().get('access')}"}
+
+    response = client.delete(f"/comments/{ids['a']}", headers=headers)
+    assert response.status_code == 204
+    async with TestingSessionLocal() as session:
+        remaining = await session.scalars(
+            select(Comment.content).where(Comment.post_id == post_id)
+        )
+        assert remaining.all() == ["b"]
+
+    response = client.delete(f"/posts/{post_id}", headers=headers)
+    assert response.status_code == 204
+    async with TestingSessionLocal() as session:
+        remaining = await session.scalars(
+            select(Comment.id).where(Comment.post_id == post_id)
+        )
+        assert remaining.all() == []
+
+
+async def test_comment_counters(add_post):
+    post_id = add_post
+    user_data = {"username": userdata["username"], "password": userdata["password"]}
+    login_response = client.post("/users/token", data=user_data)
+    headers = {"Authorization": f"Bearer {login_response.json().get('access')}"}
+    repository = CommentRepository()
+
+    async def counters():
+        async with TestingSessionLocal() as session:
+            post = await session.get(Post, post_id)
+            return post.comment_count, post.active_comment_count
+
+    async def updated_at(model, id):
+        async with TestingSessionLocal() as session:
+            return await session.scalar(select(model.updated_at).where(model.id == id))
+
+    post_updated_at = await updated_at(Post, post_id)
+    etag = client.get("/posts").headers["etag"]
+    root = client.post(
+        "/comments", headers=headers, json={"content": "Root", "post_id": post_id}
+    ).json()
+    root_id = root["id"]
+    reply = client.post(
+        "/comments",
+        headers=headers,
+        json={"content": "Reply", "post_id": post_id, "parent_id": root_id},
+    ).json()
+    assert reply["reply_count"] == 0
+    assert await counters() == (2, 2)
+    assert await updated_at(Post, post_id) == post_updated_at
+    assert await updated_at(Comment, root_id) == datetime.fromisoformat(
+        root["updated_at"]
+    )
+    response = client.get("/posts", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+    thread = client.get(f"/comments/thread?post_id={post_id}").json()
+    assert thread[0]["reply_count"] == 1
+
+    async with TestingSessionLocal() as session:
+        await repository.make_instances_inactive([reply["id"]], session)
+    assert await counters() == (2, 1)
+
+    async with TestingSessionLocal() as session:
+        await session.execute(
+            update(Post).where(Post.id == post_id).values(comment_count=99)
+        )
+        await session.commit()
+        fixed = await repository.reconcile_counters(session)
+    assert fixed["posts"] >= 1
+    assert await counters() == (2, 1)
+
+    response = client.delete(f"/comments/{root_id}", headers=headers)
+    assert response.status_code == 204
+    assert await counters() == (0, 0)
+
 
 def test_update_comment_unathorized():
     new_content = {"content": "New"}
@@ -203,6 +456,40 @@ def test_update_comment_does_not_exist():
     assert response.status_code == 404
 
 
+def test_update_and_delete_comment_of_another_user(add_post):
+    post_id = add_post
+    user_data = {"username": userdata["username"], "password": userdata["password"]}
+    owner_token = client.post("/users/token", data=user_data).json()["access"]
+    comment_id = client.post(
+        "/comments",
+        headers={"Authorization": f"Bearer {owner_token}"},
+        json={"content": "Owned comment", "post_id": post_id},
+    ).json()["id"]
+
+    client.post(
+        "/users/",
+        json={
+            "username": "intruder",
+            "email": "intruder@example.com",
+            "password": "StrongPass1!",
+            "password_confirm": "StrongPass1!",
+        },
+    )
+    intruder_data = {"username": "intruder", "password": "StrongPass1!"}
+    intruder_token = client.post("/users/token", data=intruder_data).json()["access"]
+    headers = {"Authorization": f"Bearer {intruder_token}"}
+
+    response = client.put(
+        f"/comments/{comment_id}", headers=headers, json={"content": "Hijacked"}
+    )
+    assert response.status_code == 404
+    response = client.delete(f"/comments/{comment_id}", headers=headers)
+    assert response.status_code == 404
+
+    comments = client.get(f"/comments?post_id={post_id}").json()["items"]
+    assert "Owned comment" in [comment["content"] for comment in comments]
+
+
 def test_delete_comment_success(add_post):
     post_id = add_post
     comment_data = {
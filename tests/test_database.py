@@ -0,0 +1,150 @@
+import time
+
+import pytest
+
+from sqlalchemy import insert, text
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+from src.auth.hasher import hasher
+from src.auth.models import User
+from src.config import settings
+from starlette.requests import Request
+from starlette.responses import Response
+from src.database import (
+    InstrumentedPool,
+    ReplicaRouter,
+    create_session_maker,
+    instrument_pool,
+    pool_status,
+)
+from src.metrics.registry import metrics
+from tests.conftest import DATABASE_URL, TestingSessionLocal, client, test_engine
+
+
+def make_request(cookie: str = None) -> Request:
+    headers = [(b"cookie", cookie.encode())] if cookie else []
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/",
+            "headers": headers,
+            "client": ("127.0.0.1", 5000),
+        }
+    )
+
+
+def written_cookie(router: ReplicaRouter) -> str:
+    response = Response()
+    router.mark_write(response)
+    return response.headers["set-cookie"].split(";")[0]
+
+
+def test_db_pool_endpoint_reports_configured_pool():
+    response = client.get("/metrics/db-pool")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["size"] == settings.db.DB_POOL_SIZE
+    assert data["max_overflow"] == settings.db.DB_MAX_OVERFLOW
+    assert data["checked_out"] == 0
+
+
+async def test_metrics_require_superuser_unless_public(monkeypatch):
+    async with TestingSessionLocal() as session:
+        for username, is_superuser in (
+            ("metrics_user", False),
+            ("metrics_admin", True),
+        ):
+            await session.execute(
+                insert(User).values(
+                    username=username,
+                    email=f"{username}@example.com",
+                    hashed_password=await hasher.hash("StrongPass1!"),
+                    is_superuser=is_superuser,
+                )
+            )
+        await session.commit()
+
+    def headers(username):
+        response = client.post(
+            "/users/token", data={"username": username, "password": "StrongPass1!"}
+        )
+        return {"Authorization": f"Bearer {response.json()['access']}"}
+
+    monkeypatch.setattr(settings, "METRICS_PUBLIC", False)
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics/db-pool").status_code == 401
+    assert client.get("/metrics", headers=headers("metrics_user")).status_code == 403
+    admin = headers("metrics_admin")
+    assert client.get("/metrics", headers=admin).status_code == 200
+    assert client.get("/metrics/db-pool", headers=admin).status_code == 200
+
+
+async def test_instrumented_pool_records_checkouts_and_wait_time():
+    engine = create_async_engine(
+        DATABASE_URL,
+        poolclass=InstrumentedPool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.01,
+        pool_logging_name="test",
+    )
+    pool = engine.sync_engine.pool
+    instrument_pool(pool)
+    waits_before = metrics.snapshot()["timings"].get("db.pool.test.wait_time", {})
+
+    async with engine.connect() as first, engine.connect() as second:
+        await first.execute(text("SELECT 1"))
+        await second.execute(text("SELECT 1"))
+        status = pool_status(pool)
+        assert status["checked_out"] == 2
+        assert status["overflow"] == 1
+        assert metrics.snapshot()["gauges"]["db.pool.test.checked_out"] == 2
+        assert "db.pool.writer.checked_out" not in metrics.snapshot()["gauges"]
+
+        with pytest.raises(TimeoutError):
+            await engine.connect()
+
+    snapshot = metrics.snapshot()
+    assert snapshot["gauges"]["db.pool.test.checked_out"] == 0
+    assert snapshot["counters"]["db.pool.test.timeouts"] == 1
+    assert "db.pool.test.errors" not in snapshot["counters"]
+    assert snapshot["timings"]["db.pool.test.wait_time"]["count"] >= (
+        waits_before.get("count", 0) + 3
+    )
+    await engine.dispose()
+
+
+async def test_replica_router_reads_from_replica_until_client_writes():
+    writer = create_session_maker(test_engine)
+    replica = create_session_maker(test_engine)
+    router = ReplicaRouter(writer, [replica], sticky_window=5)
+    reader = make_request()
+
+    assert router.reader_for(reader) is replica
+    author = make_request(written_cookie(router))
+    assert router.reader_for(author) is writer
+    assert router.reader_for(reader) is replica
+
+    # Any worker sharing the configuration honours the marker
+    other_worker = ReplicaRouter(writer, [replica], sticky_window=5)
+    assert other_worker.reader_for(author) is writer
+    expired = make_request(f"{ReplicaRouter.cookie_name}={time.time() - 1:.3f}")
+    assert other_worker.reader_for(expired) is replica
+    garbage = make_request(f"{ReplicaRouter.cookie_name}=soon")
+    assert other_worker.reader_for(garbage) is replica
+
+    async with router.reader_for(reader)() as session:
+        assert (await session.execute(text("SELECT 1"))).scalar() == 1
+
+
+def test_replica_router_without_replicas_or_window_uses_writer():
+    writer = create_session_maker(test_engine)
+    router = ReplicaRouter(writer, [], sticky_window=0)
+    response = Response()
+    router.mark_write(response)
+    assert "set-cookie" not in response.headers
+
+    request = make_request(f"{ReplicaRouter.cookie_name}={time.time() + 5:.3f}")
+    assert not router.is_sticky(request)
+    assert router.reader_for(request) is writer
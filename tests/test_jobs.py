@@ -0,0 +1,62 @@
+import asyncio
+import pytest
+
+from src.jobs import JobQueue, JobQueueFull
+from src.metrics.registry import metrics
+
+
+async def test_job_queue_runs_jobs_on_workers():
+    done = []
+
+    async def handler(payload):
+        await asyncio.sleep(0.01)
+        done.append(payload["id"])
+
+    queue = JobQueue(max_size=10, workers=3, put_timeout=1, drain_timeout=5)
+    queue.register("job", handler)
+    queue.start()
+    for id in range(6):
+        await queue.submit("job", {"id": id})
+    await queue.stop()
+
+    assert sorted(done) == list(range(6))
+    assert metrics.snapshot()["gauges"]["jobs.queue_depth"] == 0
+
+
+async def test_job_queue_applies_backpressure_when_full():
+    release = asyncio.Event()
+
+    async def handler(payload):
+        await release.wait()
+
+    queue = JobQueue(max_size=1, workers=1, put_timeout=0.05, drain_timeout=5)
+    queue.register("job", handler)
+    queue.start()
+    await queue.submit("job", {})
+    await asyncio.sleep(0)
+    await queue.submit("job", {})
+    with pytest.raises(JobQueueFull):
+        await queue.submit("job", {})
+
+    release.set()
+    await queue.stop()
+    with pytest.raises(JobQueueFull):
+        await queue.submit("job", {})
+
+
+async def test_job_queue_keeps_working_after_failed_job():
+    done = []
+
+    async def handler(payload):
+        if payload["fail"]:
+            raise ValueError("boom")
+        done.append(payload)
+
+    queue = JobQueue(max_size=10, workers=1, put_timeout=1, drain_timeout=5)
+    queue.register("job", handler)
+    queue.start()
+    await queue.submit("job", {"fail": True})
+    await queue.submit("job", {"fail": False})
+    await queue.stop()
+
+    assert done == [{"fail": False}]
@@ -0,0 +1,296 @@
+import asyncio
+import pytest
+
+from sqlalchemy import insert, select
+from src.auth.hasher import hasher
+from src.auth.models import User
+from src.comments.models import Comment
+from src.comments.tasks import check_comment, process_comment
+from src.genai import (
+    CircuitBreaker,
+    ModerationBatcher,
+    ModerationClient,
+    ModerationItem,
+    ModerationUnavailable,
+    VerdictCache,
+)
+from src.jobs import JobQueue
+from src.moderation import moderator
+from src.posts.models import Post
+from src.prefilter import Prefilter, load_lexicon, normalize
+from tests.conftest import FakeModerationBackend, TestingSessionLocal
+
+
+@pytest.fixture
+async def add_post_and_comments():
+    async with TestingSessionLocal() as session:
+        result = await session.execute(
+            insert(User).values(
+                username="moderation_user",
+                email="moderation@example.com",
+                hashed_password=await hasher.hash("StrongPass1!"),
+            )
+        )
+        user_id = result.inserted_primary_key[0]
+        result = await session.execute(
+            insert(Post).values(
+                title="Moderated", content="Clean content", user_id=user_id
+            )
+        )
+        post_id = result.inserted_primary_key[0]
+        comment_ids = []
+        for content in ("nice post", "badword here", "another badword"):
+            result = await session.execute(
+                insert(Comment).values(
+                    content=content, user_id=user_id, post_id=post_id
+                )
+            )
+            comment_ids.append(result.inserted_primary_key[0])
+        await session.commit()
+        return post_id, comment_ids
+
+
+async def test_batcher_sends_one_request_per_batch():
+    backend = FakeModerationBackend()
+    handled = []
+
+    async def handler(items):
+        handled.extend(items)
+
+    batcher = ModerationBatcher(backend, handler, max_batch_size=10, max_delay_ms=20)
+    verdicts = await asyncio.gather(
+        batcher.submit(ModerationItem("comment", 1, "hello")),
+        batcher.submit(ModerationItem("comment", 2, "BadWord!")),
+        batcher.submit(ModerationItem("post", 1, "fine")),
+    )
+
+    assert verdicts == [False, True, False]
+    assert len(backend.calls) == 1
+    assert handled == [ModerationItem("comment", 2, "BadWord!")]
+
+
+async def test_batcher_flushes_when_batch_is_full():
+    backend = FakeModerationBackend()
+
+    async def handler(items):
+        pass
+
+    batcher = ModerationBatcher(backend, handler, max_batch_size=2, max_delay_ms=10000)
+    await asyncio.wait_for(
+        asyncio.gather(
+            batcher.submit(ModerationItem("comment", 1, "one")),
+            batcher.submit(ModerationItem("comment", 2, "two")),
+        ),
+        timeout=1,
+    )
+    assert [len(call) for call in backend.calls] == [2]
+
+
+async def test_flagged_comments_deactivated_in_bulk(add_post_and_comments):
+    post_id, comment_ids = add_post_and_comments
+    await asyncio.gather(
+        *[
+            moderator.submit(ModerationItem("comment", id, content))
+            for id, content in zip(
+                comment_ids, ("nice post", "badword here", "another badword")
+            )
+        ],
+        moderator.submit(ModerationItem("post", post_id, "Clean content")),
+    )
+
+    async with TestingSessionLocal() as session:
+        comments = await session.scalars(
+            select(Comment).where(Comment.id.in_(comment_ids)).order_by(Comment.id)
+        )
+        assert [comment.is_active for comment in comments] == [True, False, False]
+        post = await session.get(Post, post_id)
+        assert post.is_active
+
+
+async def test_moderation_jobs_share_batches(monkeypatch):
+    backend = FakeModerationBackend()
+    monkeypatch.setattr(moderator.backend, "backend", backend)
+    queue = JobQueue(max_size=100, workers=4, put_timeout=1, drain_timeout=5)
+    queue.register(check_comment.name, process_comment)
+    queue.start()
+    for id in range(moderator.max_batch_size):
+        await queue.submit(
+            check_comment.name, {"id": 10000 + id, "content": f"queued text {id}"}
+        )
+    await queue.stop()
+    await moderator.drain()
+
+    assert [len(call) for call in backend.calls] == [moderator.max_batch_size]
+
+
+async def test_cached_verdicts_skip_the_backend():
+    backend = FakeModerationBackend()
+    handled = []
+
+    async def handler(items):
+        handled.extend(items)
+
+    batcher = ModerationBatcher(
+        backend,
+        handler,
+        max_batch_size=10,
+        max_delay_ms=5,
+        cache=VerdictCache(max_size=100, ttl=60),
+    )
+    assert await batcher.submit(ModerationItem("comment", 1, "Spam  BADWORD"))
+    verdicts = await asyncio.gather(
+        batcher.submit(ModerationItem("comment", 2, "spam badword")),
+        batcher.submit(ModerationItem("comment", 3, "fresh text")),
+        batcher.submit(ModerationItem("comment", 4, "Fresh   text")),
+    )
+
+    assert verdicts == [True, False, False]
+    assert [[item.id for item in call] for call in backend.calls] == [[1], [3]]
+    assert [item.id for item in handled] == [1, 2]
+
+
+class SlowModerationBackend(FakeModerationBackend):
+    def __init__(self, delay):
+        super().__init__()
+        self.delay = delay
+
+    async def moderate(self, items):
+        await asyncio.sleep(self.delay)
+        return await super().moderate(items)
+
+
+async def test_client_times_out_and_opens_breaker():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    client = ModerationClient(
+        SlowModerationBackend(delay=1),
+        max_concurrency=2,
+        timeout=0.01,
+        max_retries=1,
+        retry_backoff=0.001,
+        breaker=breaker,
+    )
+    with pytest.raises(ModerationUnavailable):
+        await client.moderate([ModerationItem("comment", 1, "badword")])
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 1
+
+    with pytest.raises(ModerationUnavailable):
+        await client.moderate([ModerationItem("comment", 1, "badword")])
+    assert breaker.state == CircuitBreaker.OPEN
+    calls = len(client.backend.calls)
+
+    with pytest.raises(ModerationUnavailable):
+        await client.moderate([ModerationItem("comment", 1, "badword")])
+    assert len(client.backend.calls) == calls
+
+
+async def test_batcher_defers_unmoderated_items():
+    backend = SlowModerationBackend(delay=1)
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    client = ModerationClient(
+        backend,
+        max_concurrency=2,
+        timeout=0.01,
+        max_retries=0,
+        retry_backoff=0,
+        breaker=breaker,
+    )
+    handled, deferred = [], []
+
+    async def handler(items):
+        handled.extend(items)
+
+    async def defer(items):
+        deferred.extend(items)
+
+    batcher = ModerationBatcher(
+        client, handler, max_batch_size=10, max_delay_ms=1, defer=defer
+    )
+    assert not await batcher.submit(ModerationItem("comment", 1, "badword"))
+    await batcher.drain()
+    assert [item.id for item in deferred] == [1]
+    assert not handled
+
+
+def test_prefilter_scores_lexicon_matches():
+    prefilter = Prefilter(
+        {"jerk": 0.5, "kill yourself": 1.0}, block_threshold=0.9, allow_threshold=0.0
+    )
+
+    assert prefilter.classify("Have a nice day").verdict is False
+    assert prefilter.classify("you JERKS").verdict is None
+    assert prefilter.classify("jerk jerk").score == pytest.approx(0.75)
+    assert prefilter.classify("just   KILL yourself").verdict is True
+    assert prefilter.classify("jerkin").verdict is False
+
+    prefilter = Prefilter({"jerk": 0.5}, block_threshold=0.9)
+    assert prefilter.classify("Have a nice day").verdict is None
+
+
+async def test_batcher_forwards_only_ambiguous_content():
+    backend = FakeModerationBackend()
+    handled = []
+
+    async def handler(items):
+        handled.extend(items)
+
+    batcher = ModerationBatcher(
+        backend,
+        handler,
+        max_batch_size=10,
+        max_delay_ms=5,
+        prefilter=Prefilter(
+            {"badword": 0.5, "obscenity": 1.0}, block_threshold=0.9, allow_threshold=0.0
+        ),
+    )
+    verdicts = await asyncio.gather(
+        batcher.submit(ModerationItem("comment", 1, "clean text")),
+        batcher.submit(ModerationItem("comment", 2, "pure obscenity")),
+        batcher.submit(ModerationItem("comment", 3, "a badword maybe")),
+    )
+
+    assert verdicts == [False, True, True]
+    assert [[item.id for item in call] for call in backend.calls] == [[3]]
+    assert [item.id for item in handled] == [2, 3]
+
+
+def test_load_lexicon_requires_tab_separated_weights(tmp_path):
+    path = tmp_path / "lexicon.txt"
+    path.write_text("# comment\ntop 10\njerk\t0.5\nidiot  # no weight\n")
+    assert load_lexicon(str(path)) == {
+        normalize("top 10"): 1.0,
+        "jerk": 0.5,
+        "idiot": 1.0,
+    }
+
+    path.write_text("jerk\t0.5\nidiot\t10\n")
+    with pytest.raises(ValueError, match=r"lexicon.txt:2: weight 10.0 is outside"):
+        load_lexicon(str(path))
+
+    path.write_text("jerk\theavy\n")
+    with pytest.raises(ValueError, match=r"lexicon.txt:1: invalid weight"):
+        load_lexicon(str(path))
+
+
+async def test_lexicon_miss_reaches_backend_by_default():
+    backend = FakeModerationBackend()
+    backend.banned_words = ("garbage",)
+    handled = []
+
+    async def handler(items):
+        handled.extend(items)
+
+    batcher = ModerationBatcher(
+        backend,
+        handler,
+        max_batch_size=10,
+        max_delay_ms=5,
+        prefilter=Prefilter({"badword": 0.5, "obscenity": 1.0}, block_threshold=0.9),
+    )
+    verdict = await batcher.submit(
+        ModerationItem("comment", 1, "you are a worthless piece of garbage")
+    )
+
+    assert verdict is True
+    assert [[item.id for item in call] for call in backend.calls] == [[1]]
+    assert [item.id for item in handled] == [1]
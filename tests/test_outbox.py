@@ -0,0 +1,261 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from sqlalchemy import delete, insert, select
+from src.auth.hasher import hasher
+from src.auth.models import User
+from src.comments.models import Comment
+from src.comments.repository import CommentRepository
+from src.comments.tasks import create_comment
+from src.genai import ModerationItem
+from src.jobs import JobQueueFull
+from src.moderation import defer_unmoderated
+from src.outbox.models import OutboxMessage
+from src.outbox.relay import OutboxRelay
+from src.outbox.repository import OutboxRepository
+from src.posts.repository import PostRepository
+from tests.conftest import TestingSessionLocal, override_get_async_session
+
+
+@pytest.fixture(scope="module")
+async def user_id():
+    async with TestingSessionLocal() as session:
+        result = await session.execute(
+            insert(User).values(
+                username="outbox_user",
+                email="outbox@example.com",
+                hashed_password=await hasher.hash("StrongPass1!"),
+            )
+        )
+        await session.commit()
+        return result.inserted_primary_key[0]
+
+
+async def test_writes_enqueue_messages_in_same_transaction(user_id):
+    async with TestingSessionLocal() as session:
+        post = await PostRepository().create_instance(
+            {
+                "title": "Outbox",
+                "content": "Post content",
+                "user_id": user_id,
+                "auto_reply": True,
+                "reply_text": "Thanks",
+            },
+            session,
+        )
+        comment = await CommentRepository().create_instance(
+            {"content": "Comment content", "user_id": user_id, "post_id": post.id},
+            session,
+            enqueue_reply=True,
+        )
+        messages = (
+            await session.scalars(
+                select(OutboxMessage).order_by(OutboxMessage.id.desc()).limit(3)
+            )
+        ).all()
+
+    assert [(message.task, message.payload) for message in reversed(messages)] == [
+        ("src.posts.tasks.check_post", {"id": post.id, "content": "Post content"}),
+        (
+            "src.comments.tasks.check_comment",
+            {"id": comment.id, "content": "Comment content"},
+        ),
+        (
+            "src.comments.tasks.create_reply_comment",
+            {"post_id": post.id, "parent_id": comment.id},
+        ),
+    ]
+
+
+async def test_relay_publishes_and_deletes_batches():
+    published = []
+
+    async def publisher(message):
+        published.append(message.task)
+
+    relay = OutboxRelay(
+        publisher,
+        batch_size=2,
+        poll_interval=1,
+        session_factory=override_get_async_session,
+    )
+    while await relay.drain_once():
+        pass
+
+    assert "src.posts.tasks.check_post" in published
+    async with TestingSessionLocal() as session:
+        assert not (await session.scalars(select(OutboxMessage))).all()
+
+
+async def test_relay_keeps_messages_when_publish_fails(user_id):
+    async def publisher(message):
+        raise ConnectionError("broker unavailable")
+
+    async with TestingSessionLocal() as session:
+        await PostRepository().create_instance(
+            {"title": "Retry", "content": "Retry content", "user_id": user_id},
+            session,
+        )
+
+    relay = OutboxRelay(
+        publisher,
+        batch_size=10,
+        poll_interval=1,
+        session_factory=override_get_async_session,
+    )
+    with pytest.raises(ConnectionError):
+        await relay.drain_once()
+
+    async with TestingSessionLocal() as session:
+        messages = (await session.scalars(select(OutboxMessage))).all()
+    assert messages
+    assert all(message.attempts == 0 for message in messages)
+    assert all(message.dead_lettered_at is None for message in messages)
+    async with TestingSessionLocal() as session:
+        await session.execute(delete(OutboxMessage))
+        await session.commit()
+
+
+async def test_relay_deletes_messages_published_before_a_failure():
+    async with TestingSessionLocal() as session:
+        for content in ("First", "Second", "Third"):
+            OutboxRepository.add(
+                session, "src.posts.tasks.check_post", {"content": content}
+            )
+        await session.commit()
+
+    published = []
+
+    async def publisher(message):
+        if len(published) == 2:
+            raise JobQueueFull("queue is full")
+        published.append(message.payload["content"])
+
+    relay = OutboxRelay(
+        publisher,
+        batch_size=10,
+        poll_interval=1,
+        session_factory=override_get_async_session,
+    )
+    with pytest.raises(JobQueueFull):
+        await relay.drain_once()
+
+    async with TestingSessionLocal() as session:
+        messages = (await session.scalars(select(OutboxMessage))).all()
+    assert published == ["First", "Second"]
+    assert [(message.payload["content"], message.attempts) for message in messages] == [
+        ("Third", 0)
+    ]
+
+    published.clear()
+    while await relay.drain_once():
+        pass
+    assert published == ["Third"]
+
+
+async def test_relay_dead_letters_poison_messages_and_requeues_them():
+    async with TestingSessionLocal() as session:
+        OutboxRepository.add(session, "src.unknown.task", {})
+        OutboxRepository.add(session, "src.flaky.task", {})
+        OutboxRepository.add(session, "src.posts.tasks.check_post", {})
+        await session.commit()
+
+    published, outage = [], [True]
+
+    async def publisher(message):
+        if message.task == "src.unknown.task":
+            raise KeyError(message.task)
+        if message.task == "src.flaky.task" and outage[0]:
+            raise ConnectionError("broker unavailable")
+        published.append(message.task)
+
+    relay = OutboxRelay(
+        publisher,
+        batch_size=10,
+        poll_interval=1,
+        session_factory=override_get_async_session,
+    )
+    for _ in range(10):
+        with pytest.raises(ConnectionError):
+            await relay.drain_once()
+
+    async with TestingSessionLocal() as session:
+        messages = (await session.scalars(select(OutboxMessage))).all()
+    assert [
+        (message.task, message.attempts, message.dead_lettered_at is not None)
+        for message in messages
+    ] == [
+        ("src.unknown.task", 1, True),
+        ("src.flaky.task", 0, False),
+        ("src.posts.tasks.check_post", 0, False),
+    ]
+
+    outage[0] = False
+    assert await relay.drain_once() == 2
+    assert await relay.drain_once() == 0
+    assert published == ["src.flaky.task", "src.posts.tasks.check_post"]
+
+    async with TestingSessionLocal() as session:
+        assert await OutboxRepository().requeue_dead_letters(session) == 1
+    assert await relay.drain_once() == 1
+    async with TestingSessionLocal() as session:
+        message = await session.scalar(select(OutboxMessage))
+        assert (message.attempts, message.dead_lettered_at is not None) == (2, True)
+        assert await OutboxRepository().requeue_dead_letters(session, [0]) == 0
+        await session.execute(delete(OutboxMessage))
+        await session.commit()
+
+
+async def test_deferred_moderation_waits_in_outbox():
+    await defer_unmoderated(
+        [ModerationItem("comment", 1, "badword")],
+        session_factory=override_get_async_session,
+    )
+
+    async with TestingSessionLocal() as session:
+        message = await session.scalar(select(OutboxMessage))
+        assert (message.task, message.payload) == (
+            "src.comments.tasks.check_comment",
+            {"id": 1, "content": "badword"},
+        )
+        assert not await OutboxRepository().get_batch(session, 10)
+
+        message.available_at = datetime.now(timezone.utc).replace(tzinfo=None)
+        await session.commit()
+        assert len(await OutboxRepository().get_batch(session, 10)) == 1
+        await session.execute(delete(OutboxMessage))
+        await session.commit()
+
+
+async def test_redelivered_reply_is_created_once(user_id, monkeypatch):
+    monkeypatch.setattr(
+        "src.comments.tasks.get_task_session", override_get_async_session
+    )
+    async with TestingSessionLocal() as session:
+        post = await PostRepository().create_instance(
+            {
+                "title": "Redelivered",
+                "content": "Post content",
+                "user_id": user_id,
+                "auto_reply": True,
+                "reply_text": "Thanks",
+            },
+            session,
+        )
+        comment = await CommentRepository().create_instance(
+            {"content": "Comment", "user_id": user_id, "post_id": post.id}, session
+        )
+
+    data = {"post_id": post.id, "parent_id": comment.id}
+    first = await create_comment(data)
+    assert await create_comment(data) == first
+
+    async with TestingSessionLocal() as session:
+        replies = (
+            await session.scalars(
+                select(Comment).where(Comment.parent_id == comment.id)
+            )
+        ).all()
+        await PostRepository().delete_instance(post.id, session)
+    assert [reply.id for reply in replies] == [first["id"]]
@@ -5,6 +5,10 @@ from conftest import client, TestingSessionLocal
 from src.auth.hasher import hasher
 from src.auth.models import User
 from src.posts.models import Post
+from src.posts.repository import PostRepository
+from src.posts.schemas import PostList
+from src.responses import fast_response
+from src.schemas import Page
 
 
 test_user1_data = {
@@ -85,25 +89,140 @@ def test_create_post_unauthorized():
     assert response.status_code == 401
 
 
+def test_create_posts_bulk():
+    user_data = {"username": "username123", "password": "StrongPass1!"}
+    login_response = client.post("/users/token", data=user_data)
+    headers = {"Authorization": f"Bearer {login_response.json().get('access')}"}
+    items = [
+        {"title": "Bulk one", "content": "First bulk entry"},
+        {"title": "Bulk broken"},
+        {"title": "Bulk two", "content": "Second bulk entry"},
+    ]
+
+    response = client.post("/posts/bulk", headers=headers, json=items)
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["created"], data["failed"]) == (2, 1)
+    assert [result["index"] for result in data["results"]] == [0, 1, 2]
+    assert data["results"][1]["errors"][0]["loc"] == ["content"]
+    assert data["results"][0]["id"] < data["results"][2]["id"]
+
+    response = client.get("/posts/search?q=bulk")
+    titles = {post["title"] for post in response.json()["items"]}
+    assert {"Bulk one", "Bulk two"} <= titles
+
+
+def test_create_posts_bulk_limits():
+    user_data = {"username": "username123", "password": "StrongPass1!"}
+    login_response = client.post("/users/token", data=user_data)
+    headers = {"Authorization": f"Bearer {login_response.json().get('access')}"}
+
+    assert client.post("/posts/bulk", json=[{}]).status_code == 401
+    assert client.post("/posts/bulk", headers=headers, json=[]).status_code == 422
+
+
 def test_get_posts_success():
     response = client.get("/posts")
     assert response.status_code == 200
     response_data = response.json()
-    assert len(response_data) > 0
+    assert len(response_data["items"]) > 0
+
+
+def test_get_posts_conditional():
+    response = client.get("/posts?limit=5")
+    etag = response.headers["etag"]
+    assert response.headers["last-modified"]
+
+    response = client.get("/posts?limit=5", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    response = client.get("/posts?limit=6", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+
+    response = client.get(
+        "/posts?limit=5",
+        headers={"If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"},
+    )
+    assert response.status_code == 304
+
+    user_data = {"username": "username123", "password": "StrongPass1!"}
+    login_response = client.post("/users/token", data=user_data)
+    client.post(
+        "/posts",
+        headers={"Authorization": f"Bearer {login_response.json().get('access')}"},
+        json={"title": "Fresh", "content": "Invalidates listing"},
+    )
+    response = client.get("/posts?limit=5", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
 
 
 def test_get_posts_by_username():
     response = client.get(f"/posts?username={test_user2_data['username']}")
     assert response.status_code == 200
     response_data = response.json()
-    assert len(response_data) == 1
+    assert len(response_data["items"]) == 1
 
 
 def test_get_posts_by_title():
     response = client.get(f"/posts?title={test_post1_data['title']}")
     assert response.status_code == 200
     response_data = response.json()
-    assert len(response_data) == 1
+    assert len(response_data["items"]) == 1
+
+
+def test_get_posts_paginated():
+    all_ids = [post["id"] for post in client.get("/posts").json()["items"]]
+
+    ids, cursor = [], None
+    while True:
+        params = {"limit": 1}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/posts", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page["items"]) <= 1
+        ids.extend(post["id"] for post in page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    assert ids == all_ids
+    assert len(set(ids)) == len(ids)
+
+
+def test_get_posts_invalid_cursor():
+    response = client.get("/posts?cursor=not-a-cursor")
+    assert response.status_code == 400
+
+
+def test_search_posts():
+    response = client.get("/posts/search", params={"q": "second post"})
+    assert response.status_code == 200
+    titles = [post["title"] for post in response.json()["items"]]
+    assert titles == [test_post2_data["title"]]
+
+
+def test_search_blank_query_rejected():
+    assert client.get("/posts/search", params={"q": " "}).status_code == 422
+    assert client.get("/comments/search", params={"q": "\t"}).status_code == 422
+
+
+def test_search_posts_ranked_and_paginated():
+    response = client.get("/posts/search", params={"q": "post", "limit": 1})
+    assert response.status_code == 200
+    page = response.json()
+    assert len(page["items"]) == 1
+    assert page["next_cursor"]
+
+    response = client.get(
+        "/posts/search", params={"q": "post", "limit": 1, "cursor": page["next_cursor"]}
+    )
+    assert response.status_code == 200
+    assert response.json()["items"][0]["id"] != page["items"][0]["id"]
 
 
 def test_get_personal_posts_success():
@@ -121,7 +240,7 @@ def test_get_personal_posts_success():
     )
     assert response.status_code == 200
     response_data = response.json()
-    assert len(response_data) == 1
+    assert len(response_data["items"]) == 1
 
 
 def test_get_personal_posts_unauthorized():
@@ -146,7 +265,7 @@ def test_update_and_delete_post_success():
     )
     assert response.status_code == 200
 
-    post_id = int(response.json()[0]["id"])
+    post_id = int(response.json()["items"][0]["id"])
     response = client.put(
         f"/posts/{post_id}",
         headers={"Authorization": f"Bearer {login_response_data.get('access')}"},
@@ -160,7 +279,7 @@ def test_update_and_delete_post_success():
     )
     assert response.status_code == 200
 
-    updated_title = response.json()[0]["title"]
+    updated_title = response.json()["items"][0]["title"]
     assert updated_title == "New title"
 
     response = client.delete(
@@ -168,3 +287,13 @@ def test_update_and_delete_post_success():
         headers={"Authorization": f"Bearer {login_response_data.get('access')}"},
     )
     assert response.status_code == 204
+
+
+async def test_fast_response_matches_validated_output():
+    async with TestingSessionLocal() as session:
+        posts = await PostRepository().get_list(session)
+    assert posts["items"]
+
+    fast = fast_response(Page[PostList], posts, validate=False)
+    validated = fast_response(Page[PostList], posts, validate=True)
+    assert fast.body == validated.body
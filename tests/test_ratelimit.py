@@ -0,0 +1,106 @@
+import pytest
+
+from starlette.requests import Request
+from src.auth.auth import Authenticator
+from src.metrics.registry import metrics
+from src.ratelimit import (
+    LoadMonitor,
+    MemoryBucketStore,
+    Rule,
+    load_monitor,
+    parse_rules,
+    rate_limiter,
+)
+from tests.conftest import client
+
+
+@pytest.fixture
+def limits():
+    store, rules = rate_limiter.store, rate_limiter.rules
+    rate_limiter.store = MemoryBucketStore(max_keys=100)
+    rate_limiter.rules = {("POST", "/users/token"): Rule(2, 60)}
+    rate_limiter.enabled = True
+    yield rate_limiter
+    rate_limiter.enabled = False
+    rate_limiter.store, rate_limiter.rules = store, rules
+
+
+def make_request(token: str = None) -> Request:
+    headers = [(b"authorization", f"Bearer {token}".encode())] if token else []
+    return Request(
+        {
+            "type": "http",
+            "method": "POST",
+            "path": "/comments",
+            "headers": headers,
+            "client": ("10.0.0.1", 5000),
+        }
+    )
+
+
+def test_parse_rules():
+    assert parse_rules("POST /comments=30/60, post /users/token=5/1") == {
+        ("POST", "/comments"): Rule(30, 60.0),
+        ("POST", "/users/token"): Rule(5, 1.0),
+    }
+
+
+async def test_memory_bucket_refills_over_time():
+    store = MemoryBucketStore(max_keys=1)
+    rule = Rule(2, 1)
+    assert (await store.take("a", rule)).allowed
+    assert (await store.take("a", rule)).allowed
+    result = await store.take("a", rule)
+    assert not result.allowed
+    assert 0 < result.retry_after <= 0.5
+
+    assert (await store.take("b", rule)).allowed
+    assert (await store.take("a", rule)).allowed
+
+
+async def test_identity_uses_token_user_or_client_ip():
+    token = await Authenticator.create_access_token({"sub": "limited", "id": 42})
+    assert await rate_limiter.identity(make_request(token)) == "user:42"
+    assert await rate_limiter.identity(make_request("garbage")) == "ip:10.0.0.1"
+    assert await rate_limiter.identity(make_request()) == "ip:10.0.0.1"
+
+
+def test_rate_limited_route_returns_429(limits):
+    data = {"username": "nobody", "password": "wrong"}
+    first = client.post("/users/token", data=data)
+    assert first.status_code == 401
+    assert first.headers["x-ratelimit-limit"] == "2"
+    assert first.headers["x-ratelimit-remaining"] == "1"
+    client.post("/users/token", data=data)
+
+    response = client.post("/users/token", data=data)
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+    assert "x-ratelimit-limit" not in client.get("/posts").headers
+    assert metrics.snapshot()["counters"]["ratelimit.rejected"] >= 1
+
+
+def test_overloaded_app_sheds_requests():
+    load_monitor.loop_lag = load_monitor.max_loop_lag + 1
+    try:
+        response = client.get("/posts")
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+        assert client.get("/metrics").status_code == 200
+    finally:
+        load_monitor.loop_lag = 0.0
+    assert client.get("/posts").status_code == 200
+
+
+def test_load_monitor_tracks_pool_wait_per_interval():
+    monitor = LoadMonitor(interval=0.5, max_loop_lag=0.5, max_pool_wait=1.0)
+    monitor.sample(0.0)
+    metrics.observe("db.pool.writer.wait_time", 3.0)
+    metrics.observe("db.pool.writer.wait_time", 1.0)
+    monitor.sample(0.1)
+    assert monitor.pool_wait == 2.0
+    assert monitor.overloaded() == "pool_wait"
+
+    monitor.sample(0.6)
+    assert monitor.pool_wait == 0.0
+    assert monitor.overloaded() == "loop_lag"
@@ -0,0 +1,203 @@
+import asyncio
+
+import pytest
+
+from sqlalchemy import insert, select
+from starlette.requests import Request
+from starlette.responses import Response
+from src.auth.hasher import hasher
+from src.auth.models import User
+from src.comments.repository import CommentRepository
+from src.metrics.registry import metrics
+from src.posts.models import Post
+from src.posts.repository import PostRepository
+from src.response_cache import MemoryResponseBackend, ResponseCache, response_cache
+from tests.conftest import TestingSessionLocal, client
+
+cache_user = {
+    "username": "cache_user",
+    "email": "cache@example.com",
+    "password": "StrongPass1!",
+}
+
+
+@pytest.fixture(scope="module")
+async def headers():
+    async with TestingSessionLocal() as session:
+        await session.execute(
+            insert(User).values(
+                username=cache_user["username"],
+                email=cache_user["email"],
+                hashed_password=await hasher.hash(cache_user["password"]),
+            )
+        )
+        await session.commit()
+    response = client.post(
+        "/users/token",
+        data={"username": cache_user["username"], "password": cache_user["password"]},
+    )
+    return {"Authorization": f"Bearer {response.json()['access']}"}
+
+
+def make_request(path: str = "/posts", query: str = "") -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": path,
+            "query_string": query.encode(),
+            "headers": [],
+        }
+    )
+
+
+def test_anonymous_post_list_is_cached_until_a_post_is_written(headers):
+    params = {"title": "Cached"}
+    client.post("/posts", headers=headers, json={"title": "Cached 1", "content": "a"})
+
+    first = client.get("/posts", params=params)
+    second = client.get("/posts", params=params)
+    assert first.headers["x-cache"] == "MISS"
+    assert second.headers["x-cache"] == "HIT"
+    assert second.json() == first.json()
+    assert second.headers["etag"] == first.headers["etag"]
+
+    response = client.get(
+        "/posts", params=params, headers={"If-None-Match": first.headers["etag"]}
+    )
+    assert response.status_code == 304
+
+    client.post("/posts", headers=headers, json={"title": "Cached 2", "content": "b"})
+    third = client.get("/posts", params=params)
+    assert third.headers["x-cache"] == "MISS"
+    assert [post["title"] for post in third.json()["items"]] == [
+        "Cached 2",
+        "Cached 1",
+    ]
+
+
+def test_authenticated_requests_bypass_cache(headers):
+    response = client.get("/posts", headers=headers)
+    assert response.status_code == 200
+    assert "x-cache" not in response.headers
+
+
+async def test_comment_list_invalidated_by_writes_and_moderation(headers):
+    post_id = client.post(
+        "/posts", headers=headers, json={"title": "Commented", "content": "c"}
+    ).json()["id"]
+    comment_id = client.post(
+        "/comments", headers=headers, json={"content": "First", "post_id": post_id}
+    ).json()["id"]
+    posts = client.get("/posts", params={"title": "Commented"})
+    assert posts.json()["items"][0]["comment_count"] == 1
+
+    client.get("/comments", params={"post_id": post_id})
+    response = client.get("/comments", params={"post_id": post_id})
+    assert response.headers["x-cache"] == "HIT"
+
+    async with TestingSessionLocal() as session:
+        await CommentRepository().make_instances_inactive([comment_id], session)
+
+    response = client.get("/comments", params={"post_id": post_id})
+    assert response.headers["x-cache"] == "MISS"
+    assert response.json()["items"][0]["is_active"] is False
+
+    posts = client.get("/posts", params={"title": "Commented"})
+    assert posts.headers["x-cache"] == "MISS"
+    assert posts.json()["items"][0]["active_comment_count"] == 0
+
+    stats = metrics.snapshot()
+    assert stats["counters"]["response_cache.hit"] >= 1
+    assert 0 < stats["gauges"]["response_cache.hit_ratio"] < 1
+    assert stats["timings"]["response_cache.hit_time"]["count"] >= 1
+
+
+async def test_concurrent_misses_build_once():
+    cache = ResponseCache(
+        MemoryResponseBackend(max_size=10, max_tags=10), ttl=30, lock_timeout=5
+    )
+    builds = []
+
+    async def build(tags: set):
+        builds.append(1)
+        await asyncio.sleep(0.01)
+        tags.add("post:1")
+        return Response(b"[]", media_type="application/json")
+
+    responses = await asyncio.gather(
+        *[cache.serve(make_request(), build, ["posts"]) for _ in range(10)]
+    )
+    assert len(builds) == 1
+    assert [response.headers["x-cache"] for response in responses].count("HIT") == 9
+
+    await cache.invalidate(["post:1"])
+    response = await cache.serve(make_request(), build, ["posts"])
+    assert response.headers["x-cache"] == "MISS"
+    assert len(builds) == 2
+
+
+async def test_write_during_build_is_not_cached():
+    cache = ResponseCache(
+        MemoryResponseBackend(max_size=10, max_tags=10), ttl=30, lock_timeout=5
+    )
+
+    async def build(tags: set):
+        await cache.invalidate(["posts"])
+        return Response(b"[]", media_type="application/json")
+
+    await cache.serve(make_request(), build, ["posts"])
+    response = await cache.serve(make_request(), build, ["posts"])
+    assert response.headers["x-cache"] == "MISS"
+
+
+async def test_write_to_discovered_tag_during_build_is_not_cached():
+    cache = ResponseCache(
+        MemoryResponseBackend(max_size=10, max_tags=10), ttl=30, lock_timeout=5
+    )
+    writes = []
+
+    async def build(tags: set):
+        tags.add("post:1")
+        if not writes:
+            # A comment on the listed post commits while the page is built
+            writes.append(1)
+            await cache.invalidate(["post:1"])
+        return Response(b"[]", media_type="application/json")
+
+    await cache.serve(make_request(), build, ["posts"])
+    response = await cache.serve(make_request(), build, ["posts"])
+    assert response.headers["x-cache"] == "MISS"
+    response = await cache.serve(make_request(), build, ["posts"])
+    assert response.headers["x-cache"] == "HIT"
+
+
+async def test_memory_backend_bounds_tags_without_reviving_entries():
+    backend = MemoryResponseBackend(max_size=10, max_tags=2)
+    before = await backend.versions(["post:1", "post:2"])
+    await backend.invalidate(["post:1"])
+    await backend.invalidate(["post:2", "post:3"])
+    await backend.invalidate(["post:4"])
+
+    assert len(backend.tags) == 2
+    after = await backend.versions(["post:1", "post:2"])
+    assert all(after[tag] != before[tag] for tag in before)
+
+
+async def test_repository_writes_invalidate_before_returning():
+    versions = await response_cache.backend.versions(["posts"])
+    async with TestingSessionLocal() as session:
+        user = await session.scalar(select(User).limit(1))
+        await PostRepository().create_instance(
+            {"title": "Awaited", "content": "a", "user_id": user.id}, session
+        )
+        assert "cache_tags" not in session.info
+        await PostRepository().delete_instance(
+            await session.scalar(select(Post.id).where(Post.title == "Awaited")),
+            session,
+        )
+    assert await response_cache.backend.versions(["posts"]) != versions
+
+
+def test_response_cache_uses_memory_backend_in_tests():
+    assert isinstance(response_cache.backend, MemoryResponseBackend)
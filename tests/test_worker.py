@@ -0,0 +1,55 @@
+import asyncio
+
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import func, select
+from sqlalchemy.pool import NullPool
+from src.auth.models import User
+from src.worker import WorkerRuntime
+from tests.conftest import DATABASE_URL
+
+
+def make_runtime(max_concurrency=2):
+    return WorkerRuntime(
+        DATABASE_URL, max_concurrency=max_concurrency, poolclass=NullPool
+    )
+
+
+def test_runtime_keeps_one_loop_and_own_engine():
+    runtime = make_runtime()
+    loops = []
+
+    async def count_users():
+        loops.append(asyncio.get_running_loop())
+        assert runtime.is_current()
+        async with runtime.session_maker() as session:
+            return await session.scalar(select(func.count(User.id)))
+
+    try:
+        first = runtime.run(count_users())
+        second = runtime.run(count_users())
+    finally:
+        runtime.stop()
+
+    assert first == second
+    assert loops[0] is loops[1] is runtime.loop
+    assert not runtime.started
+
+
+def test_runtime_bounds_concurrency():
+    runtime = make_runtime(max_concurrency=2)
+    running, peak = 0, 0
+
+    async def job():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+
+    try:
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            list(executor.map(lambda _: runtime.run(job()), range(6)))
+    finally:
+        runtime.stop()
+
+    assert peak == 2